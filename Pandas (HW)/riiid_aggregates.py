@@ -0,0 +1,209 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from riiid_incidence import QuestionIndex
+from riiid_sharding import user_features
+
+# Декларативный набор именованных агрегатов для correlation_check.
+# Каждый агрегат вычисляется один раз при первом обращении и переиспользуется всеми отчётами.
+# Суммы и количества по вопросам, правильности ответа и пояснениям
+# считаются за один общий проход по train (агрегат "question_totals"),
+# признаки пользователей - по шардам user_id в пуле процессов (агрегат "user_features").
+AGGREGATES = {}
+
+
+def aggregate(name):
+    # Регистрирует функцию как агрегат с заданным именем
+    def register(function):
+        AGGREGATES[name] = function
+        return function
+    return register
+
+
+class AggregatePipeline:
+    # workers - количество процессов для признаков пользователей (None - все ядра),
+    # shards - количество шардов по user_id (по умолчанию по одному на процесс)
+    def __init__(self, train_questions, train_lectures, questions_table, lectures_table, workers=1, shards=None):
+        self.train_questions = train_questions
+        self.train_lectures = train_lectures
+        self.questions_table = questions_table
+        self.lectures_table = lectures_table
+        self.workers = workers
+        self.shards = shards if shards is not None else (workers or os.cpu_count() or 1)
+        self.cache = {}
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            self.cache[name] = AGGREGATES[name](self)
+        return self.cache[name]
+
+
+@aggregate("question_totals")
+def question_totals(pipeline):
+    # Единый проход по ответам: суммы правильных ответов и количества
+    # по content_id, по правильности ответа и по флагу пояснения
+    train = pipeline.train_questions
+    correct = train["answered_correctly"].to_numpy(dtype=np.float64)
+    content_ids = train["content_id"].to_numpy(dtype=np.int64)
+    explained = train["prior_question_had_explanation"].to_numpy(dtype=np.int8)
+    answered = train["answered_correctly"].to_numpy(dtype=np.int64)
+    elapsed = train["prior_question_elapsed_time"].to_numpy(dtype=np.float64)
+    return {
+        "content_correct": np.bincount(content_ids, weights=correct),
+        "content_count": np.bincount(content_ids),
+        "elapsed_by_answer": np.bincount(answered, weights=elapsed, minlength=2),
+        "count_by_answer": np.bincount(answered, minlength=2),
+        "correct_by_explanation": np.bincount(explained, weights=correct, minlength=2),
+        "count_by_explanation": np.bincount(explained, minlength=2),
+    }
+
+
+@aggregate("content_accuracy")
+def content_accuracy(pipeline):
+    # Процент правильных ответов по каждому вопросу
+    totals = pipeline["question_totals"]
+    content_ids = np.flatnonzero(totals["content_count"])
+    return pd.DataFrame({
+        "content_id": content_ids.astype(pipeline.train_questions["content_id"].dtype),
+        "answered_correctly": totals["content_correct"][content_ids] / totals["content_count"][content_ids],
+    })
+
+
+@aggregate("user_features")
+def sharded_user_features(pipeline):
+    # Суммы по пользователям и признаки с лагом внутри пользователя, по шардам user_id
+    return user_features(
+        pipeline.train_questions, pipeline.train_lectures, pipeline.lectures_table,
+        shards=pipeline.shards, workers=pipeline.workers,
+    )
+
+
+@aggregate("user_accuracy")
+def user_accuracy(pipeline):
+    # Процент правильных ответов каждого пользователя
+    user_answers = pipeline["user_features"]["user_answers"]
+    return pd.DataFrame({
+        "user_id": user_answers.index,
+        "answered_correctly_perc": (user_answers["correct"] / user_answers["answers"]).to_numpy(),
+    }).sort_values(
+        "answered_correctly_perc"
+    )
+
+
+@aggregate("elapsed_by_correctness")
+def elapsed_by_correctness(pipeline):
+    # Среднее время ответа на предыдущий вопрос в зависимости от правильности ответа
+    totals = pipeline["question_totals"]
+    answers = np.flatnonzero(totals["count_by_answer"])
+    return pd.DataFrame({
+        "answered_correctly": answers.astype(pipeline.train_questions["answered_correctly"].dtype),
+        "prior_question_elapsed_time": totals["elapsed_by_answer"][answers] / totals["count_by_answer"][answers],
+    })
+
+
+@aggregate("explanation_accuracy")
+def explanation_accuracy(pipeline):
+    # Процент правильных ответов в зависимости от просмотра пояснения к предыдущему вопросу
+    totals = pipeline["question_totals"]
+    flags = np.flatnonzero(totals["count_by_explanation"])
+    return pd.DataFrame(
+        {"answered_correctly": totals["correct_by_explanation"][flags] / totals["count_by_explanation"][flags]},
+        index=pd.Index(flags.astype(bool), name="prior_question_had_explanation"),
+    )
+
+
+@aggregate("current_explanation_accuracy")
+def current_explanation_accuracy(pipeline):
+    # Процент правильных ответов в зависимости от просмотра пояснения к текущему вопросу
+    # (лаг считается внутри каждого пользователя в порядке timestamp)
+    explained = pipeline["user_features"]["explained"]
+    return pd.DataFrame({"answered_correctly": explained["correct"] / explained["answers"]})
+
+
+@aggregate("user_lectures")
+def user_lectures(pipeline):
+    # Доля прослушанных лекций для каждого пользователя
+    lectures_count = len(pipeline.lectures_table.lecture_id)
+    user_lectures = pipeline["user_features"]["user_lectures"]
+    return pd.DataFrame({
+        "user_id": user_lectures.index,
+        "listened_lectures_perc": (user_lectures["listened"] / lectures_count).to_numpy(),
+    }).sort_values(
+        "listened_lectures_perc"
+    )
+
+
+@aggregate("lectures_vs_success")
+def lectures_vs_success(pipeline):
+    # Зависимость успешности тестирования от посещаемости лекций
+    return pipeline["user_lectures"].merge(pipeline["user_accuracy"], on="user_id")
+
+
+@aggregate("questions_full_info")
+def questions_full_info(pipeline):
+    # Процент правильных ответов по вопросам вместе с описанием вопросов
+    return pipeline["content_accuracy"].merge(
+        pipeline.questions_table, left_on=["content_id"], right_on=["question_id"]
+    )
+
+
+@aggregate("question_index")
+def question_index(pipeline):
+    # Матрицы инцидентности вопросов с тегами, частями и бандлами
+    return QuestionIndex(pipeline.questions_table)
+
+
+@aggregate("question_vectors")
+def question_vectors(pipeline):
+    # Векторы по question_id: точность вопроса, признак отвеченного вопроса,
+    # число правильных ответов и число ответов
+    index = pipeline["question_index"]
+    totals = pipeline["question_totals"]
+    accuracy = pipeline["content_accuracy"]
+    content_ids = np.arange(len(totals["content_count"]))
+    return {
+        "accuracy": index.vector(accuracy["content_id"], accuracy["answered_correctly"]),
+        "answered": index.vector(accuracy["content_id"], np.ones(len(accuracy))),
+        "correct": index.vector(content_ids, totals["content_correct"]),
+        "answers": index.vector(content_ids, totals["content_count"]),
+    }
+
+
+def question_rollup(pipeline, name):
+    # Средняя точность вопросов по метке (как groupby по questions_full_info)
+    vectors = pipeline["question_vectors"]
+    return pipeline["question_index"].rollup(
+        name, vectors["accuracy"], vectors["answered"]
+    ).filter(
+        [name, "answered_correctly"]
+    ).sort_values(
+        "answered_correctly"
+    )
+
+
+@aggregate("bundle_accuracy")
+def bundle_accuracy(pipeline):
+    return question_rollup(pipeline, "bundle_id")
+
+
+@aggregate("part_accuracy")
+def part_accuracy(pipeline):
+    return question_rollup(pipeline, "part")
+
+
+@aggregate("tag_accuracy")
+def tag_accuracy(pipeline):
+    return question_rollup(pipeline, "tags")
+
+
+@aggregate("tag_answers")
+def tag_answers(pipeline):
+    # Точность и количество по тегам на уровне отдельных ответов
+    vectors = pipeline["question_vectors"]
+    return pipeline["question_index"].rollup(
+        "tags", vectors["correct"], vectors["answers"]
+    ).sort_values(
+        "answered_correctly"
+    )
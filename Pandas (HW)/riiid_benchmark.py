@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import riiid_cache
+from riiid_aggregates import AggregatePipeline
+from riiid_generate import generate
+from riiid_loader import TRAIN_ANALYSIS_COLUMNS, load_train, read_lectures, read_questions
+
+# Замеры времени и пиковой памяти каждой части анализа correlation_check.
+# Каждая часть замеряется независимо, вместе со всеми промежуточными агрегатами, которые ей нужны.
+# Загрузка замеряется дважды: "load" - первое чтение (разбор CSV и запись кеша),
+# "load_cached" - повторное чтение из колоночного кеша.
+# Результат - JSON-отчёт, по которому можно отслеживать регрессии и эффект оптимизаций.
+# Пример: python riiid_benchmark.py --generate 10000000 --output report.json
+
+# Части анализа и агрегаты, которые они вычисляют (в порядке correlation_check)
+REGIONS = {
+    "elapsed_vs_correctness": ["elapsed_by_correctness"],
+    "explanation_effect": ["explanation_accuracy", "current_explanation_accuracy"],
+    "lecture_attendance": ["lectures_vs_success"],
+    "bundle_part_tag": ["bundle_accuracy", "part_accuracy", "tag_accuracy"],
+}
+
+
+def measure(function, setup=None):
+    # Время выполнения и пиковая память, выделенная за время вызова.
+    # tracemalloc заметно замедляет код с большим количеством выделений памяти,
+    # поэтому время замеряется в отдельном запуске без трассировки, а пик памяти - во втором.
+    # setup вызывается перед каждым запуском (например, чтобы сбросить кеш)
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, {"seconds": round(seconds, 4), "peak_bytes": peak}
+
+
+def run(data_dir, workers=1, cache=True):
+    report = {"data_dir": os.path.abspath(data_dir), "workers": workers, "cache": cache, "regions": {}}
+    regions = report["regions"]
+
+    def load():
+        return (
+            read_lectures(os.path.join(data_dir, "lectures.csv"), cache=cache),
+            read_questions(os.path.join(data_dir, "questions.csv"), cache=cache),
+            *load_train(os.path.join(data_dir, "train-001.csv"), usecols=TRAIN_ANALYSIS_COLUMNS, cache=cache),
+        )
+
+    def clear_cache():
+        shutil.rmtree(os.path.join(data_dir, riiid_cache.CACHE_DIR_NAME), ignore_errors=True)
+
+    tables, regions["load"] = measure(load, setup=clear_cache if cache else None)
+    if cache:
+        tables, regions["load_cached"] = measure(load)
+    lectures_table, questions_table, train_questions, train_lectures = tables
+    report["rows"] = {"train_questions": len(train_questions), "train_lectures": len(train_lectures)}
+
+    main_columns = [
+        "timestamp", "answered_correctly",
+        "prior_question_elapsed_time",
+        "prior_question_had_explanation"
+    ]
+    _, regions["describe"] = measure(lambda: train_questions.filter(main_columns).astype(
+        {"prior_question_had_explanation": "float32"}
+    ).describe())
+
+    # Для каждой части анализа - свой конвейер агрегатов: иначе общие промежуточные агрегаты
+    # (question_totals, user_features, question_index) оплачивала бы первая использующая их часть,
+    # а остальные выглядели бы почти бесплатными. Время части включает все её зависимости
+    def region_aggregates(names):
+        aggregates = AggregatePipeline(train_questions, train_lectures, questions_table, lectures_table,
+                                       workers=workers)
+        return [aggregates[name] for name in names]
+
+    for region, names in REGIONS.items():
+        _, regions[region] = measure(lambda: region_aggregates(names))
+
+    # Общее время - как у первого запуска: повторная загрузка из кеша в сумму не входит
+    report["total_seconds"] = round(
+        sum(seconds["seconds"] for region, seconds in regions.items() if region != "load_cached"), 4
+    )
+    # Максимальный размер резидентной памяти процесса (на Linux - в килобайтах)
+    report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры производительности анализа Riiid")
+    parser.add_argument("--data", default="./ext_files", help="папка с lectures.csv, questions.csv, train-001.csv")
+    parser.add_argument("--generate", type=int, metavar="ROWS",
+                        help="сгенерировать синтетические данные заданного размера во временную папку")
+    parser.add_argument("--workers", type=int, default=1, help="количество процессов (0 - все ядра)")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать колоночный кеш")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию - стандартный вывод)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data
+        if args.generate:
+            data_dir = os.path.join(temp_dir, "ext_files")
+            generate(data_dir, args.generate)
+        report = run(data_dir, workers=args.workers or None, cache=not args.no_cache)
+        if args.generate:
+            report["generated_rows"] = args.generate
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
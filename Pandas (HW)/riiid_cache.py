@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Колоночный кеш таблиц на диске.
+# Каждая колонка хранится отдельным бинарным файлом и читается через np.memmap,
+# поэтому при повторном запуске CSV не разбирается, а с диска читаются только нужные колонки.
+# Кеш привязан к размеру и времени изменения исходного файла и к схеме типов колонок,
+# с которой он был записан, и пересоздаётся при изменении любого из них.
+CACHE_DIR_NAME = ".riiid_cache"
+META_FILE = "meta.json"
+
+
+def cache_dir(source):
+    return os.path.join(os.path.dirname(os.path.abspath(source)), CACHE_DIR_NAME, os.path.basename(source))
+
+
+def source_signature(source):
+    stat = os.stat(source)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_meta(source, schema=None):
+    # schema - словарь типов колонок, с которым читается исходный файл (None - не проверять)
+    meta_path = os.path.join(cache_dir(source), META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as file:
+        meta = json.load(file)
+    if meta["source"] != source_signature(source):
+        return None  # исходный файл изменился, кеш устарел
+    if schema is not None and meta.get("schema") != schema:
+        return None  # изменились типы колонок, кеш записан со старой схемой
+    return meta
+
+
+def is_cached(source, schema=None):
+    return read_meta(source, schema) is not None
+
+
+def write_chunks(source, chunks, schema=None):
+    # Записывает порции таблицы в кеш и отдаёт их дальше без изменений.
+    # meta.json пишется последним, поэтому прерванная запись не даёт "битый" кеш
+    directory = cache_dir(source)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    columns = {}
+    rows = 0
+    for chunk in chunks:
+        for name, series in chunk.items():
+            column = columns.setdefault(name, {"dtype": str(series.dtype)})
+            values = _encode(series, column)
+            with open(os.path.join(directory, f"{name}.bin"), "ab") as file:
+                values.tofile(file)
+        rows += len(chunk)
+        yield chunk
+
+    meta = {"source": source_signature(source), "schema": schema, "rows": rows, "columns": columns}
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as file:
+        json.dump(meta, file, ensure_ascii=False)
+
+
+def write_table(source, frame, schema=None):
+    for _ in write_chunks(source, [frame], schema):
+        pass
+    return frame
+
+
+def iter_chunks(source, chunksize, columns=None):
+    # Читает таблицу из кеша порциями, отображая в память только нужные колонки
+    meta = read_meta(source)
+    names = [name for name in meta["columns"] if columns is None or name in columns]
+    arrays = {
+        name: np.memmap(os.path.join(cache_dir(source), f"{name}.bin"),
+                        dtype=meta["columns"][name]["storage"], mode="r", shape=(meta["rows"],))
+        if meta["rows"] else np.empty(0, dtype=meta["columns"][name]["storage"])
+        for name in names
+    }
+    for start in range(0, max(meta["rows"], 1), chunksize):
+        stop = min(start + chunksize, meta["rows"])
+        yield pd.DataFrame(
+            {name: _decode(arrays[name][start:stop], meta["columns"][name]) for name in names},
+            index=pd.RangeIndex(start, stop),
+        )
+
+
+def read_table(source, columns=None):
+    meta = read_meta(source)
+    return next(iter_chunks(source, max(meta["rows"], 1), columns))
+
+
+def _encode(series, column):
+    if column["dtype"] == "boolean":
+        # Пропуски храним как -1
+        column["storage"] = "int8"
+        return series.astype("Int8").fillna(-1).to_numpy("int8")
+    if column["dtype"] in ("category", "string", "object", "str"):
+        # Строки храним кодами словаря, словарь пополняется от порции к порции
+        column["storage"] = "int32"
+        categories = column.setdefault("categories", [])
+        new_values = pd.Index(series.dropna().astype(str).unique()).difference(categories)
+        categories.extend(new_values.tolist())
+        return pd.Categorical(series.astype("string"), categories=categories).codes.astype("int32")
+    column["storage"] = column["dtype"]
+    return series.to_numpy()
+
+
+def _decode(values, column):
+    if column["dtype"] == "boolean":
+        values = np.asarray(values)
+        return pd.arrays.BooleanArray(values == 1, values < 0)
+    if "categories" in column:
+        categorical = pd.Categorical.from_codes(np.asarray(values), categories=column["categories"])
+        return categorical if column["dtype"] == "category" else pd.Series(categorical).astype("string").array
+    return np.asarray(values)
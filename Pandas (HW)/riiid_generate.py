@@ -0,0 +1,119 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from riiid_loader import ID_LECTURES, ID_QUESTIONS
+
+# Генератор синтетических таблиц train/questions/lectures в формате Riiid
+# заданного размера для замеров производительности correlation_check.
+# Пропорции близки к исходному набору: ~101 млн строк на ~393 тыс. пользователей,
+# 13523 вопроса в ~9765 бандлах, 418 лекций, 188 тегов, 7 частей, ~2% строк - лекции.
+QUESTIONS = 13523
+BUNDLES = 9765
+LECTURES = 418
+TAGS = 188
+PARTS = 7
+ROWS_PER_USER = 257
+LECTURE_SHARE = 0.02
+EXPLANATION_SHARE = 0.9
+
+
+def generate_questions(rng):
+    question_ids = np.arange(QUESTIONS)
+    # Вопросы одного бандла идут подряд
+    bundle_ids = np.sort(rng.integers(0, BUNDLES, QUESTIONS))
+    tags_count = rng.integers(1, 7, QUESTIONS)
+    tags = [" ".join(map(str, rng.choice(TAGS, count, replace=False))) for count in tags_count]
+    return pd.DataFrame({
+        "question_id": question_ids,
+        "bundle_id": bundle_ids,
+        "correct_answer": rng.integers(0, 4, QUESTIONS),
+        "part": rng.integers(1, PARTS + 1, QUESTIONS),
+        "tags": tags,
+    })
+
+
+def generate_lectures(rng):
+    return pd.DataFrame({
+        "lecture_id": np.sort(rng.choice(32736, LECTURES, replace=False)),
+        "tag": rng.integers(0, TAGS, LECTURES),
+        "part": rng.integers(1, PARTS + 1, LECTURES),
+        "type_of": rng.choice(["concept", "solving question", "intention", "starter"], LECTURES),
+    })
+
+
+def generate_train_chunk(rng, start, rows, first_user, lecture_ids, difficulty):
+    # Порция train: пользователи идут подряд, у каждого время ответов возрастает
+    row_ids = np.arange(start, start + rows)
+    user_starts = np.flatnonzero(np.r_[True, rng.random(rows - 1) < 1 / ROWS_PER_USER])
+    user_lengths = np.diff(np.r_[user_starts, rows])
+    user_index = np.repeat(np.arange(len(user_starts)), user_lengths)
+    # Идентификаторы пользователей возрастают с разреженными промежутками, как в исходных данных
+    user_ids = first_user + (np.arange(len(user_starts)) * 5000 + rng.integers(0, 5000, len(user_starts)))[user_index]
+    first_row = np.zeros(rows, dtype=bool)
+    first_row[user_starts] = True
+    position = np.arange(rows) - user_starts[user_index]
+    # Время от начала занятий пользователя
+    gaps = rng.integers(1_000, 60_000, rows)
+    gaps[user_starts] = 0
+    elapsed_total = np.cumsum(gaps)
+    timestamp = elapsed_total - elapsed_total[user_starts][user_index]
+
+    is_lecture = rng.random(rows) < LECTURE_SHARE
+    content_ids = np.where(is_lecture, rng.choice(lecture_ids, rows), rng.integers(0, QUESTIONS, rows))
+    # Вероятность правильного ответа зависит от сложности вопроса
+    correct = (rng.random(rows) < difficulty[np.minimum(content_ids, QUESTIONS - 1)]).astype(np.int8)
+
+    elapsed = rng.integers(1_000, 60_000, rows).astype(np.float32)
+    explained = np.where(rng.random(rows) < EXPLANATION_SHARE, "True", "False").astype(object)
+    # У первого ответа пользователя и у лекций нет данных о предыдущем вопросе
+    no_prior = first_row | is_lecture
+    elapsed[no_prior] = np.nan
+    explained[no_prior] = None
+
+    return pd.DataFrame({
+        "row_id": row_ids,
+        "timestamp": timestamp,
+        "user_id": user_ids,
+        "content_id": content_ids,
+        "content_type_id": np.where(is_lecture, ID_LECTURES, ID_QUESTIONS),
+        "task_container_id": np.minimum(position, 9999),
+        "user_answer": np.where(is_lecture, -1, rng.integers(0, 4, rows)),
+        "answered_correctly": np.where(is_lecture, -1, correct),
+        "prior_question_elapsed_time": elapsed,
+        "prior_question_had_explanation": explained,
+    }), user_ids.max() + 1
+
+
+def generate(directory, rows, seed=0, chunksize=1_000_000):
+    # Записывает lectures.csv, questions.csv и train-001.csv в directory.
+    # train пишется порциями, поэтому размер таблицы не ограничен памятью
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    questions = generate_questions(rng)
+    lectures = generate_lectures(rng)
+    questions.to_csv(os.path.join(directory, "questions.csv"), index=False)
+    lectures.to_csv(os.path.join(directory, "lectures.csv"), index=False)
+
+    difficulty = rng.beta(5, 2, QUESTIONS)
+    lecture_ids = lectures["lecture_id"].to_numpy()
+    train_path = os.path.join(directory, "train-001.csv")
+    first_user = 0
+    with open(train_path, "w", newline="") as file:
+        for start in range(0, rows, chunksize):
+            chunk, first_user = generate_train_chunk(
+                rng, start, min(chunksize, rows - start), first_user, lecture_ids, difficulty
+            )
+            chunk.to_csv(file, index=False, header=start == 0)
+    return train_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генератор синтетических данных Riiid")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="количество строк train")
+    parser.add_argument("--output", default="./ext_files", help="папка для файлов")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.output, args.rows, args.seed)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Разреженные матрицы инцидентности "вопрос x тег", "вопрос x part" и "вопрос x bundle_id".
+# Строятся один раз по questions.csv, после чего точность и количество по тегам, частям
+# и бандлам считаются умножением матрицы на вектор по вопросам (или по ответам),
+# без str.split + explode и без размножения строк по тегам.
+
+
+def incidence(row_ids, labels, rows):
+    # Матрица rows x (число уникальных меток): 1 там, где вопрос имеет метку
+    codes, uniques = pd.factorize(pd.Series(labels), sort=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(codes)), (row_ids, codes)), shape=(rows, len(uniques))
+    )
+    return matrix, np.asarray(uniques)
+
+
+class QuestionIndex:
+    def __init__(self, questions_table):
+        question_ids = questions_table["question_id"].to_numpy(dtype=np.int64)
+        self.rows = int(question_ids.max()) + 1 if len(question_ids) else 0
+
+        # Теги хранятся строкой через пробел; вопросы без тегов в матрицу не попадают
+        tags = questions_table["tags"].dropna().astype(str).str.split(" ")
+        tag_rows = np.repeat(question_ids[questions_table["tags"].notna().to_numpy()], tags.str.len().to_numpy())
+        tag_labels = np.concatenate(tags.to_numpy()) if len(tags) else np.empty(0, dtype=str)
+
+        self.incidences = {
+            "tags": incidence(tag_rows, tag_labels, self.rows),
+            "part": incidence(question_ids, questions_table["part"].to_numpy(), self.rows),
+            "bundle_id": incidence(question_ids, questions_table["bundle_id"].to_numpy(), self.rows),
+        }
+
+    def vector(self, ids, values):
+        # Вектор по вопросам длины self.rows из значений, заданных для части question_id
+        result = np.zeros(self.rows)
+        ids = np.asarray(ids)
+        known = ids < self.rows
+        result[ids[known]] = np.asarray(values)[known]
+        return result
+
+    def rollup(self, name, values, weights):
+        # Сумма values и weights по меткам name и их отношение.
+        # Для средней точности по вопросам: values - точность вопроса, weights - 1 для отвеченных вопросов;
+        # для точности по ответам: values - число правильных ответов, weights - число ответов
+        matrix, labels = self.incidences[name]
+        totals = matrix.T @ values
+        counts = matrix.T @ weights
+        present = counts > 0
+        return pd.DataFrame({
+            name: labels[present],
+            "answered_correctly": totals[present] / counts[present],
+            "count": counts[present],
+        })
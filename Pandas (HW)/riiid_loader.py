@@ -0,0 +1,129 @@
+import pandas as pd
+
+import riiid_cache
+
+ID_QUESTIONS = 0
+ID_LECTURES = 1
+
+# Размер порции при потоковом чтении train.
+# Память на разбор CSV определяется размером порции, а не размером файла
+# (итоговые таблицы load_train, конечно, занимают память целиком)
+CHUNK_SIZE = 1_000_000
+
+# Компактные типы колонок вместо int64/float64/object по умолчанию
+TRAIN_DTYPES = {
+    "row_id": "int64",
+    "timestamp": "int64",
+    "user_id": "int32",
+    "content_id": "int16",
+    "content_type_id": "int8",
+    "task_container_id": "int16",
+    "user_answer": "int8",
+    "answered_correctly": "int8",
+    "prior_question_elapsed_time": "float32",
+    "prior_question_had_explanation": "boolean",
+}
+QUESTIONS_DTYPES = {
+    "question_id": "int16",
+    "bundle_id": "int16",
+    "correct_answer": "int8",
+    "part": "int8",
+    "tags": "string",
+}
+LECTURES_DTYPES = {
+    "lecture_id": "int16",
+    "tag": "int16",
+    "part": "int8",
+    "type_of": "category",
+}
+
+# Колонки, не нужные для лекций в train
+LECTURES_NOT_REQUIRED_COLUMNS = [
+    "prior_question_had_explanation",
+    "prior_question_elapsed_time", "answered_correctly",
+    "user_answer", "timestamp"
+]
+
+
+# Колонки train, которые нужны анализу в correlation_check
+TRAIN_ANALYSIS_COLUMNS = [
+    "timestamp", "user_id", "content_id", "content_type_id", "answered_correctly",
+    "prior_question_elapsed_time", "prior_question_had_explanation",
+]
+
+
+def read_lectures(path, usecols=None, cache=True):
+    return _read_table(path, LECTURES_DTYPES, usecols, cache)
+
+
+def read_questions(path, usecols=None, cache=True):
+    return _read_table(path, QUESTIONS_DTYPES, usecols, cache)
+
+
+def iter_train_chunks(path, chunksize=CHUNK_SIZE, usecols=None, cache=True):
+    # Потоковое чтение train порциями с компактными типами.
+    # При cache=True первое чтение сохраняет колоночную копию таблицы,
+    # последующие читают из неё только колонки usecols
+    if cache and riiid_cache.is_cached(path, TRAIN_DTYPES):
+        yield from riiid_cache.iter_chunks(path, chunksize, usecols)
+        return
+
+    if not cache:
+        dtype = {column: kind for column, kind in TRAIN_DTYPES.items() if usecols is None or column in usecols}
+        yield from pd.read_csv(path, dtype=dtype, usecols=usecols, chunksize=chunksize)
+        return
+
+    # В кеш записываются все колонки, чтобы он подходил для любого набора usecols
+    chunks = pd.read_csv(path, dtype=TRAIN_DTYPES, chunksize=chunksize)
+    for chunk in riiid_cache.write_chunks(path, chunks, TRAIN_DTYPES):
+        yield chunk if usecols is None else chunk[[column for column in chunk.columns if column in usecols]]
+
+
+def _read_table(path, dtype, usecols, cache):
+    if not cache:
+        return pd.read_csv(path, dtype=dtype, usecols=usecols)
+    if not riiid_cache.is_cached(path, dtype):
+        riiid_cache.write_table(path, pd.read_csv(path, dtype=dtype), dtype)
+    return riiid_cache.read_table(path, usecols)
+
+
+def split_chunk(chunk):
+    # Делит порцию train на вопросы и лекции.
+    # Используем dropna() для "вопросов",
+    # исходя из описания для prior_question_had_explanation, где указано,
+    # что это вопросы без обратной связи, используемые для диагностики.
+    questions = chunk[chunk.content_type_id == ID_QUESTIONS].dropna()
+    lectures = chunk[chunk.content_type_id == ID_LECTURES].drop(
+        LECTURES_NOT_REQUIRED_COLUMNS, axis=1, errors="ignore"
+    )
+    return questions, lectures
+
+
+def load_train(path, chunksize=CHUNK_SIZE, usecols=None, cache=True):
+    # Читает train порциями и сразу делит каждую порцию на вопросы и лекции.
+    # Разбор ограничен порцией, но результат по определению целиком в памяти:
+    # пик - итоговые таблицы плюс одна колонка (см. _assemble), а не двойной размер как у pd.concat
+    questions_parts = {}
+    lectures_parts = {}
+    for chunk in iter_train_chunks(path, chunksize, usecols, cache):
+        questions, lectures = split_chunk(chunk)
+        _append_columns(questions_parts, questions)
+        _append_columns(lectures_parts, lectures)
+    return _assemble(questions_parts), _assemble(lectures_parts)
+
+
+def _append_columns(parts, frame):
+    # Колонки порции копируются по отдельности, чтобы они не держали общий блок порции,
+    # а индекс отфильтрованной порции заменяется на RangeIndex, чтобы не хранить его для каждой части
+    frame = frame.reset_index(drop=True)
+    for column in frame.columns:
+        parts.setdefault(column, []).append(frame[column].copy())
+
+
+def _assemble(parts):
+    # Склеивает колонки по одной и сразу освобождает их порции,
+    # поэтому сверх итоговой таблицы в памяти только порции текущей колонки
+    columns = {}
+    for column in list(parts):
+        columns[column] = pd.concat(parts.pop(column), ignore_index=True)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Вычисление признаков уровня пользователя по шардам.
+# Строки делятся на шарды по user_id, поэтому все строки одного пользователя
+# попадают в один шард, и признаки с лагом (shift) не переходят от одного пользователя к другому.
+# Шарды обрабатываются параллельно в пуле процессов, результаты объединяются.
+
+
+def shard_by_user(frame, shards):
+    # Хеш-разбиение строк по user_id
+    shard_ids = frame["user_id"].to_numpy() % shards
+    return [frame[shard_ids == shard] for shard in range(shards)]
+
+
+def user_shard_features(train_questions, train_lectures, lecture_ids):
+    # Признаки пользователей одного шарда
+
+    # Успешность пользователей: количество правильных ответов и всех ответов
+    user_answers = train_questions.groupby("user_id").aggregate(
+        correct=("answered_correctly", "sum"),
+        answers=("answered_correctly", "count"),
+    )
+
+    # Количество прослушанных лекций
+    user_lectures = train_lectures[train_lectures.content_id.isin(lecture_ids)].groupby(
+        "user_id"
+    ).aggregate(
+        listened=("content_id", "count")
+    )
+
+    # Пояснение к текущему вопросу - флаг prior_question_had_explanation следующего ответа
+    # того же пользователя, поэтому лаг считается внутри пользователя в порядке timestamp
+    ordered = train_questions.sort_values(["user_id", "timestamp"], kind="stable")
+    explained = pd.DataFrame({
+        "current_question_explained": ordered.groupby("user_id").prior_question_had_explanation.shift(-1),
+        "answered_correctly": ordered.answered_correctly,
+    }).groupby(
+        "current_question_explained"
+    ).aggregate(
+        correct=("answered_correctly", "sum"),
+        answers=("answered_correctly", "count"),
+    )
+    return user_answers, user_lectures, explained
+
+
+def user_features(train_questions, train_lectures, lectures_table, shards=1, workers=1):
+    # Признаки всех пользователей. workers - количество процессов (None - все ядра)
+    lecture_ids = lectures_table.lecture_id.unique()
+    question_shards = shard_by_user(train_questions, shards)
+    lecture_shards = shard_by_user(train_lectures, shards)
+    tasks = (question_shards, lecture_shards, [lecture_ids] * shards)
+
+    if workers == 1:
+        shard_results = list(map(user_shard_features, *tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shard_results = list(executor.map(user_shard_features, *tasks))
+
+    user_answers, user_lectures, explained = zip(*shard_results)
+    # Пользователи в разных шардах не пересекаются, поэтому их таблицы просто объединяются,
+    # а суммы по флагу пояснения складываются
+    explained = pd.concat(explained).groupby(level=0).sum()
+    return {
+        "user_answers": pd.concat(user_answers),
+        "user_lectures": pd.concat(user_lectures),
+        "explained": explained,
+    }
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Векторные проверки гипотез о средних для многих сегментов сразу.
+# На вход - массивы сводных статистик по сегментам (средние, стандартные отклонения с ddof=1,
+# размеры выборок) или сырые данные с колонками сегмента, группы и значения.
+# Статистики, p-value и критические значения считаются одним проходом NumPy по всем сегментам,
+# поправки на множественные сравнения - Бонферрони и Бенджамини-Хохберг.
+# Результат - DataFrame, по строке на сегмент.
+
+
+def z_test(mean, population_mean, population_std, n, alternative="two-sided", alpha=0.05, correction=None):
+    # z-критерий для среднего при известном стандартном отклонении генеральной совокупности
+    mean, population_mean, population_std, n = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (mean, population_mean, population_std, n))
+    )
+    statistic = (mean - population_mean) / (population_std / np.sqrt(n))
+    return _result(statistic, stats.norm, {}, alternative, alpha, correction)
+
+
+def t_test(mean, std, n, population_mean=0.0, alternative="two-sided", alpha=0.05, correction=None):
+    # Одновыборочный t-критерий; парный t-критерий - это он же для разностей пар
+    mean, std, n, population_mean = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (mean, std, n, population_mean))
+    )
+    statistic = (mean - population_mean) / (std / np.sqrt(n))
+    return _result(statistic, stats.t, {"df": n - 1}, alternative, alpha, correction)
+
+
+def t_test_ind(mean1, std1, n1, mean2, std2, n2, equal_var=False, alternative="two-sided", alpha=0.05,
+               correction=None):
+    # Двухвыборочный t-критерий: по умолчанию Уэлча (дисперсии не равны),
+    # при equal_var=True - Стьюдента с объединённой дисперсией
+    mean1, std1, n1, mean2, std2, n2 = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (mean1, std1, n1, mean2, std2, n2))
+    )
+    variance1 = std1 ** 2 / n1
+    variance2 = std2 ** 2 / n2
+    if equal_var:
+        df = n1 + n2 - 2
+        pooled = ((n1 - 1) * std1 ** 2 + (n2 - 1) * std2 ** 2) / df
+        standard_error = np.sqrt(pooled * (1 / n1 + 1 / n2))
+    else:
+        # Приведённое число степеней свободы Уэлча-Саттертуэйта
+        df = (variance1 + variance2) ** 2 / (variance1 ** 2 / (n1 - 1) + variance2 ** 2 / (n2 - 1))
+        standard_error = np.sqrt(variance1 + variance2)
+    statistic = (mean1 - mean2) / standard_error
+    return _result(statistic, stats.t, {"df": df}, alternative, alpha, correction)
+
+
+def summarize(frame, segment, group, value, groups=None):
+    # Сводные статистики двух групп по сегментам из сырых данных:
+    # колонки mean1, std1, n1, mean2, std2, n2, индекс - сегменты
+    summary = frame.groupby([segment, group])[value].agg(["mean", "std", "count"]).unstack(group)
+    if groups is None:
+        groups = summary.columns.get_level_values(group).unique()
+    if len(groups) != 2:
+        raise ValueError(f"Нужны ровно две группы, получено: {list(groups)}")
+    result = pd.DataFrame(index=summary.index)
+    for suffix, label in zip("12", groups):
+        result["mean" + suffix] = summary[("mean", label)]
+        result["std" + suffix] = summary[("std", label)]
+        result["n" + suffix] = summary[("count", label)]
+    return result
+
+
+def t_test_groups(frame, segment, group, value, groups=None, equal_var=False, alternative="two-sided",
+                  alpha=0.05, correction=None):
+    # t-критерий для двух групп в каждом сегменте по сырым данным
+    summary = summarize(frame, segment, group, value, groups)
+    result = t_test_ind(*(summary[column].to_numpy() for column in summary.columns), equal_var=equal_var,
+                        alternative=alternative, alpha=alpha, correction=correction)
+    result.index = summary.index
+    return result
+
+
+def adjust_p_values(p_values, method="bonferroni"):
+    # Поправка p-value на множественные сравнения
+    p_values = np.asarray(p_values, dtype=np.float64)
+    count = p_values.size
+    if method == "bonferroni":
+        return np.minimum(p_values * count, 1.0)
+    if method == "bh":
+        # Бенджамини-Хохберг: p_(i) * m / i, затем минимум по всем следующим рангам
+        flat = p_values.ravel()
+        order = np.argsort(flat)
+        ranked = flat[order] * count / np.arange(1, count + 1)
+        adjusted = np.empty(count)
+        adjusted[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+        return adjusted.reshape(p_values.shape)
+    raise ValueError(f"Неизвестная поправка: {method}")
+
+
+def _result(statistic, distribution, parameters, alternative, alpha, correction):
+    if alternative == "two-sided":
+        p_value = 2 * distribution.sf(np.abs(statistic), **parameters)
+        critical = distribution.ppf(1 - alpha / 2, **parameters)
+    elif alternative == "greater":
+        p_value = distribution.sf(statistic, **parameters)
+        critical = distribution.ppf(1 - alpha, **parameters)
+    elif alternative == "less":
+        p_value = distribution.cdf(statistic, **parameters)
+        critical = distribution.ppf(alpha, **parameters)
+    else:
+        raise ValueError(f"Неизвестная альтернатива: {alternative}")
+
+    result = pd.DataFrame({"statistic": np.ravel(statistic)})
+    for name, values in parameters.items():
+        result[name] = np.ravel(values)
+    result["critical"] = np.ravel(np.broadcast_to(critical, np.shape(statistic)))
+    result["p_value"] = np.ravel(p_value)
+    if correction is None:
+        result["reject"] = result["p_value"] < alpha
+    else:
+        result["p_adjusted"] = adjust_p_values(result["p_value"].to_numpy(), correction)
+        result["reject"] = result["p_adjusted"] < alpha
+    return result
@@ -1,20 +1,103 @@
-import random
+import argparse
+
+import numpy as np
+
 list_number = list(range(0, 40))
-value = random.choice(list_number)
-is_black=True
-print(value if value < 39 else "00")
-is_odd = True if value % 2 == 0 else False
-
-if 0 < value < 12 or 18 < value < 28:
-    is_black = True if is_odd else False
-else:
-    is_black = False if is_odd else True
-
-if value == 0:
-    print("zero")
-elif value == 39:
-    print("double zero")
-else:
-    print("ODD" if is_odd else "not odd")
-    print("BLACK" if is_black else "red")
+DOUBLE_ZERO = 39
+
+# Таблицы свойств для каждого номера вместо ветвлений на каждый спин
+numbers = np.array(list_number)
+IS_ZERO = numbers == 0
+IS_DOUBLE_ZERO = numbers == DOUBLE_ZERO
+IS_ODD = numbers % 2 == 0
+IS_BLACK = np.where((0 < numbers) & (numbers < 12) | (18 < numbers) & (numbers < 28), IS_ODD, ~IS_ODD)
+
+# Американское колесо для бэктеста: 38 ячеек (0, 00 и 1-36, номер 37 - это "00"), 18 красных.
+# Таблицы выше описывают колесо print_spin из 40 ячеек и для бэктеста не подходят:
+# на нём ставка на красное выигрывала бы чаще, чем проигрывала
+AMERICAN_POCKETS = 38
+AMERICAN_RED = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]
+AMERICAN_RED_WIN = np.isin(np.arange(AMERICAN_POCKETS), AMERICAN_RED)
+
+STRATEGIES = ("flat", "martingale", "dalembert")
+
+
+def spin(rng, size=None, pockets=len(list_number)):
+    return rng.integers(0, pockets, size)
+
+
+def print_spin(value):
+    print(value if value < DOUBLE_ZERO else "00")
+    if IS_ZERO[value]:
+        print("zero")
+    elif IS_DOUBLE_ZERO[value]:
+        print("double zero")
+    else:
+        print("ODD" if IS_ODD[value] else "not odd")
+        print("BLACK" if IS_BLACK[value] else "red")
+
+
+def backtest(strategy, trajectories, spins, bankroll=100, base_bet=1, table_limit=None, seed=None,
+             red_win=AMERICAN_RED_WIN):
+    # Одновременно моделирует trajectories игроков, каждый делает до spins ставок на красное.
+    # Игрок разоряется, когда банка не хватает на очередную ставку.
+    # red_win - таблица колеса: для каждой ячейки, выигрывает ли в ней ставка на красное
+    rng = np.random.default_rng(seed)
+    balance = np.full(trajectories, bankroll, dtype=np.int64)
+    bet = np.full(trajectories, base_bet, dtype=np.int64)
+    active = np.ones(trajectories, dtype=bool)
+
+    for _ in range(spins):
+        active &= balance >= bet
+        if not active.any():
+            break
+        win = red_win[spin(rng, trajectories, len(red_win))]
+        balance += np.where(active, np.where(win, bet, -bet), 0)
+
+        if strategy == "martingale":
+            # После проигрыша ставка удваивается, после выигрыша возвращается к базовой
+            next_bet = np.where(win, base_bet, bet * 2)
+        elif strategy == "dalembert":
+            # После проигрыша ставка растёт на базовую, после выигрыша уменьшается на неё
+            next_bet = np.maximum(np.where(win, bet - base_bet, bet + base_bet), base_bet)
+        elif strategy == "flat":
+            next_bet = bet
+        else:
+            raise ValueError(f"Неизвестная стратегия: {strategy}")
+        if table_limit is not None:
+            next_bet = np.minimum(next_bet, table_limit)
+        bet = np.where(active, next_bet, bet)
+
+    # Разорён тот, кому не хватает банка на следующую ставку по своей системе
+    ruined = balance < bet
+    returns = (balance - bankroll) / bankroll
+    return {
+        "strategy": strategy,
+        "ruin_probability": ruined.mean(),
+        "mean_return": returns.mean(),
+        "return_percentiles": dict(zip((5, 25, 50, 75, 95), np.percentile(returns, (5, 25, 50, 75, 95)))),
+        "returns": returns,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Рулетка")
+    parser.add_argument("--backtest", choices=STRATEGIES, nargs="*",
+                        help="стратегии ставок для бэктеста (без параметра - один спин)")
+    parser.add_argument("--trajectories", type=int, default=100_000)
+    parser.add_argument("--spins", type=int, default=1_000)
+    parser.add_argument("--bankroll", type=int, default=100)
+    parser.add_argument("--bet", type=int, default=1)
+    parser.add_argument("--table-limit", type=int)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
 
+    if args.backtest is None:
+        print_spin(spin(np.random.default_rng(args.seed)))
+    else:
+        for strategy in args.backtest or STRATEGIES:
+            result = backtest(strategy, args.trajectories, args.spins, args.bankroll, args.bet,
+                              args.table_limit, args.seed)
+            percentiles = ", ".join(f"p{p}={value:.3f}" for p, value in result["return_percentiles"].items())
+            print(f"{strategy}: ruin={result['ruin_probability']:.4f} "
+                  f"mean_return={result['mean_return']:.4f} {percentiles}")
@@ -0,0 +1,103 @@
+from functools import lru_cache
+from string import ascii_uppercase
+
+import numpy as np
+
+# Оптимальный порядок умножения цепочки матриц (динамическое программирование, O(n^3)).
+# План зависит только от размеров матриц, поэтому кешируется по сигнатуре размеров:
+# повторные вызовы с теми же размерами не пересчитывают план.
+
+
+class ChainPlan:
+    def __init__(self, shapes, split, cost, peak_elements):
+        self.shapes = shapes
+        self.split = split  # split[i][j] - где делить цепочку i..j
+        self.multiplications = cost  # количество скалярных умножений
+        self.flops = 2 * cost  # умножения и сложения
+        self.peak_elements = peak_elements  # пик числа элементов промежуточных результатов
+
+    def peak_bytes(self, itemsize=8):
+        return self.peak_elements * itemsize
+
+    def order(self, names=None):
+        # Расстановка скобок, например "(A*B)*C"
+        names = names or _names(len(self.shapes))
+        return self.__order(0, len(self.shapes) - 1, names, top=True)
+
+    def __order(self, i, j, names, top=False):
+        if i == j:
+            return names[i]
+        k = self.split[i][j]
+        expression = f"{self.__order(i, k, names)}*{self.__order(k + 1, j, names)}"
+        return expression if top else f"({expression})"
+
+
+def chain_plan(shapes):
+    # shapes - список размеров (строки, столбцы) матриц цепочки
+    shapes = tuple((int(rows), int(cols)) for rows, cols in shapes)
+    for (_, cols), (rows, _) in zip(shapes, shapes[1:]):
+        if cols != rows:
+            raise ValueError(f"Несогласованные размеры матриц: {shapes}")
+    return _plan(shapes)
+
+
+@lru_cache(maxsize=256)
+def _plan(shapes):
+    n = len(shapes)
+    if n == 0:
+        raise ValueError("Пустая цепочка матриц")
+    dims = [shapes[0][0]] + [cols for _, cols in shapes]
+    cost = [[0] * n for _ in range(n)]
+    split = [[0] * n for _ in range(n)]
+
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            cost[i][j] = None
+            for k in range(i, j):
+                candidate = cost[i][k] + cost[k + 1][j] + dims[i] * dims[k + 1] * dims[j + 1]
+                if cost[i][j] is None or candidate <= cost[i][j]:
+                    cost[i][j] = candidate
+                    split[i][j] = k
+
+    plan = ChainPlan(shapes, split, cost[0][n - 1], 0)
+    plan.peak_elements = _peak(plan, dims, 0, n - 1)
+    return plan
+
+
+def _peak(plan, dims, i, j):
+    # Пиковое число элементов промежуточных результатов при вычислении цепочки i..j:
+    # левый результат хранится, пока вычисляется правый, затем оба нужны для их произведения.
+    # Исходные матрицы не учитываются
+    if i == j:
+        return 0
+    k = plan.split[i][j]
+    left = dims[i] * dims[k + 1] if k > i else 0
+    right = dims[k + 1] * dims[j + 1] if k + 1 < j else 0
+    result = dims[i] * dims[j + 1]
+    return max(_peak(plan, dims, i, k), left + _peak(plan, dims, k + 1, j), left + right + result)
+
+
+def multiply_chain(matrices, plan=None):
+    # Перемножает цепочку матриц в оптимальном порядке
+    matrices = [np.asarray(matrix) for matrix in matrices]
+    plan = plan or chain_plan([matrix.shape for matrix in matrices])
+    return _multiply(matrices, plan, 0, len(matrices) - 1)
+
+
+def _multiply(matrices, plan, i, j):
+    if i == j:
+        return matrices[i]
+    k = plan.split[i][j]
+    return _multiply(matrices, plan, i, k) @ _multiply(matrices, plan, k + 1, j)
+
+
+def multiplication_order(*matrices):
+    # Наиболее эффективный порядок умножения матриц, например "(A*B)*C"
+    return chain_plan([np.shape(matrix) for matrix in matrices]).order()
+
+
+def _names(count):
+    if count <= len(ascii_uppercase):
+        return list(ascii_uppercase[:count])
+    return [f"M{index + 1}" for index in range(count)]
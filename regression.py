@@ -0,0 +1,112 @@
+import numpy as np
+from scipy import linalg
+
+# Метод наименьших квадратов по частям данных.
+# Вместо обращения X^T X накапливаются X^T X и X^T y порциями строк (из памяти, np.memmap
+# или генератора), а коэффициенты находятся разложением Холецкого. Для вырожденных или
+# плохо обусловленных задач вместо None - решение с небольшой ridge-регуляризацией.
+# Память - O(p^2) независимо от количества строк, новые строки добавляются через partial_fit.
+
+# Относительная величина ridge-регуляризации, если X^T X вырождена
+RIDGE_FALLBACK = 1e-10
+
+
+class StreamingOLS:
+    def __init__(self, ridge=0.0):
+        self.ridge = ridge  # явная ridge-регуляризация (0 - обычный МНК)
+        self.xtx = None
+        self.xty = None
+        self.yty = None
+        self.rows = 0
+        self.targets_2d = False
+        self.method = None  # каким способом решена последняя задача
+
+    def partial_fit(self, X, y):
+        # Добавляет порцию строк; можно вызывать сколько угодно раз по мере поступления данных
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[:, None]
+        self.targets_2d = y.ndim == 2
+        y = y.reshape(len(y), -1)
+        if len(X) != len(y):
+            raise ValueError(f"Разное количество строк в X и y: {len(X)} и {len(y)}")
+
+        if self.xtx is None:
+            self.xtx = np.zeros((X.shape[1], X.shape[1]))
+            self.xty = np.zeros((X.shape[1], y.shape[1]))
+            self.yty = np.zeros(y.shape[1])
+        elif X.shape[1] != self.xtx.shape[0]:
+            raise ValueError(f"Ожидалось {self.xtx.shape[0]} признаков, получено {X.shape[1]}")
+        self.xtx += X.T @ X
+        self.xty += X.T @ y
+        self.yty += np.einsum("ij,ij->j", y, y)
+        self.rows += len(X)
+        return self
+
+    def fit(self, chunks):
+        # chunks - итерируемый источник пар (X, y), например iter_chunks(...)
+        for X, y in chunks:
+            self.partial_fit(X, y)
+        return self
+
+    def merge(self, other):
+        # Объединяет накопленные суммы (например, посчитанные в разных процессах)
+        if other.xtx is None:
+            return self
+        if self.xtx is None:
+            self.xtx, self.xty, self.yty = other.xtx.copy(), other.xty.copy(), other.yty.copy()
+            self.targets_2d = other.targets_2d
+        else:
+            self.xtx += other.xtx
+            self.xty += other.xty
+            self.yty += other.yty
+        self.rows += other.rows
+        return self
+
+    def coefficients(self, method="cholesky"):
+        # method: "cholesky" - разложение Холецкого (при неудаче - ridge-регуляризация),
+        # "lstsq" - решение с минимальной нормой через SVD
+        if self.xtx is None:
+            raise ValueError("Нет данных: вызовите partial_fit или fit")
+        xtx = self.xtx + self.ridge * np.eye(len(self.xtx))
+        if method == "lstsq":
+            coefficients = np.linalg.lstsq(xtx, self.xty, rcond=None)[0]
+            self.method = "lstsq"
+        elif method == "cholesky":
+            try:
+                coefficients = linalg.cho_solve(linalg.cho_factor(xtx), self.xty)
+                self.method = "cholesky"
+            except linalg.LinAlgError:
+                # Вырожденная матрица: сдвигаем диагональ на малую долю её среднего значения
+                shift = RIDGE_FALLBACK * max(np.trace(xtx) / len(xtx), 1.0)
+                coefficients = linalg.cho_solve(linalg.cho_factor(xtx + shift * np.eye(len(xtx))), self.xty)
+                self.method = "ridge"
+        else:
+            raise ValueError(f"Неизвестный метод: {method}")
+        return coefficients if self.targets_2d else coefficients[:, 0]
+
+    def residual_sum_of_squares(self, coefficients):
+        # ||y - X b||^2 = y^T y - 2 b^T X^T y + b^T X^T X b, без повторного прохода по данным
+        b = np.asarray(coefficients).reshape(len(self.xtx), -1)
+        rss = self.yty - 2 * np.einsum("ij,ij->j", b, self.xty) + np.einsum("ij,ik,kj->j", b, self.xtx, b)
+        return rss if self.targets_2d else rss[0]
+
+
+def iter_chunks(X, y=None, chunksize=100_000):
+    # Порции строк из массивов, DataFrame или np.memmap: в память попадает только текущая порция.
+    # Без y (например, для корреляций между признаками) вторым элементом пары идёт None
+    for start in range(0, len(X), chunksize):
+        stop = start + chunksize
+        yield _rows(X, start, stop), None if y is None else _rows(y, start, stop)
+
+
+def _rows(data, start, stop):
+    if hasattr(data, "iloc"):
+        return data.iloc[start:stop].to_numpy()
+    return data[start:stop]
+
+
+def fit_model(X, y, chunksize=100_000, ridge=0.0, method="cholesky"):
+    # Коэффициенты линейной регрессии без явного обращения матрицы
+    return StreamingOLS(ridge).fit(iter_chunks(X, y, chunksize)).coefficients(method)
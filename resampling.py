@@ -0,0 +1,144 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+# Бутстреп и перестановочный тест без предположения о нормальности.
+# Реплики генерируются матрицами индексов (block x n) и считаются векторно по строкам,
+# поэтому память на блок ограничена block * n, а блоки распределяются по пулу процессов.
+# У каждого блока свой SeedSequence(seed, spawn_key=(номер блока,)), поэтому результат
+# при заданном seed не зависит от количества процессов.
+#
+# Статистики:
+#   "pearson", "spearman" - корреляция пар (x[i], y[i]);
+#   "mean_difference" - разность средних двух независимых выборок x и y.
+
+
+def _pearson(x, y):
+    # Корреляция Пирсона по строкам матриц x и y
+    dx = x - x.mean(axis=-1, keepdims=True)
+    dy = y - y.mean(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.einsum("...i,...i->...", dx, dy) / np.sqrt(
+            np.einsum("...i,...i->...", dx, dx) * np.einsum("...i,...i->...", dy, dy)
+        )
+
+
+def _spearman(x, y):
+    return _pearson(stats.rankdata(x, axis=-1), stats.rankdata(y, axis=-1))
+
+
+def _mean_difference(x, y):
+    return x.mean(axis=-1) - y.mean(axis=-1)
+
+
+FUNCTIONS = {"pearson": _pearson, "spearman": _spearman, "mean_difference": _mean_difference}
+
+
+def estimate(x, y, statistic):
+    # Значение статистики на исходных данных
+    return float(FUNCTIONS[statistic](np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)))
+
+
+def _bootstrap_block(x, y, statistic, size, seed_sequence):
+    rng = np.random.default_rng(seed_sequence)
+    if statistic == "mean_difference":
+        # Выборки независимы, поэтому каждая ресэмплируется отдельно
+        return _mean_difference(
+            x[rng.integers(0, len(x), (size, len(x)))], y[rng.integers(0, len(y), (size, len(y)))]
+        )
+    indices = rng.integers(0, len(x), (size, len(x)))
+    if statistic == "spearman":
+        return _pearson(_resample_ranks(x, indices), _resample_ranks(y, indices))
+    return FUNCTIONS[statistic](x[indices], y[indices])
+
+
+def _resample_ranks(values, indices):
+    # Средние ранги значений в каждой строке ресэмпла без сортировки строк:
+    # по количеству каждого уникального значения в строке ранг - число меньших значений
+    # плюс середина группы равных (как stats.rankdata с method="average")
+    levels, codes = np.unique(values, return_inverse=True)
+    sample_codes = codes[indices]
+    rows = np.arange(len(indices))[:, None] * len(levels)
+    counts = np.bincount((sample_codes + rows).ravel(), minlength=len(indices) * len(levels))
+    counts = counts.reshape(len(indices), len(levels))
+    ranks = np.cumsum(counts, axis=1) - counts + (counts + 1) / 2
+    return np.take_along_axis(ranks, sample_codes, axis=1)
+
+
+def _permutation_block(x, y, statistic, size, seed_sequence):
+    rng = np.random.default_rng(seed_sequence)
+    if statistic == "mean_difference":
+        # Перемешиваем объединённую выборку и делим её на группы исходных размеров
+        pooled = np.concatenate([x, y])
+        indices = rng.permuted(np.broadcast_to(np.arange(len(pooled)), (size, len(pooled))), axis=1)
+        return _mean_difference(pooled[indices[:, :len(x)]], pooled[indices[:, len(x):]])
+    # Для корреляции перемешивается только y. Ранги и средние от перестановки не меняются,
+    # поэтому считаются один раз, а на блок остаётся одно матричное умножение
+    if statistic == "spearman":
+        x, y = stats.rankdata(x), stats.rankdata(y)
+    dx = x - x.mean()
+    dy = y - y.mean()
+    indices = rng.permuted(np.broadcast_to(np.arange(len(y)), (size, len(y))), axis=1)
+    return dy[indices] @ dx / np.sqrt((dx @ dx) * (dy @ dy))
+
+
+def _replicates(block_function, x, y, statistic, replicates, block, workers, seed):
+    if statistic not in FUNCTIONS:
+        raise ValueError(f"Неизвестная статистика: {statistic}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if statistic != "mean_difference" and len(x) != len(y):
+        raise ValueError(f"Разная длина x и y: {len(x)} и {len(y)}")
+    seed = seed if seed is not None else np.random.SeedSequence().entropy
+    sizes = [min(block, replicates - start) for start in range(0, replicates, block)]
+    seeds = [np.random.SeedSequence(seed, spawn_key=(index,)) for index in range(len(sizes))]
+    tasks = ([x] * len(sizes), [y] * len(sizes), [statistic] * len(sizes), sizes, seeds)
+
+    if workers == 1:
+        blocks = list(map(block_function, *tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            blocks = list(executor.map(block_function, *tasks))
+    return x, y, np.concatenate(blocks)
+
+
+def bootstrap(x, y, statistic="pearson", replicates=10_000, confidence=0.95, block=1_000, workers=1,
+              seed=None):
+    # Перцентильный доверительный интервал статистики.
+    # workers - количество процессов (None - все ядра)
+    x, y, values = _replicates(_bootstrap_block, x, y, statistic, replicates, block, workers, seed)
+    low, high = np.nanpercentile(values, [50 * (1 - confidence), 50 * (1 + confidence)])
+    return {
+        "statistic": statistic,
+        "estimate": estimate(x, y, statistic),
+        "low": float(low),
+        "high": float(high),
+        "standard_error": float(np.nanstd(values, ddof=1)),
+        "replicates": replicates,
+    }
+
+
+def permutation_test(x, y, statistic="pearson", replicates=10_000, alternative="two-sided", block=1_000,
+                     workers=1, seed=None):
+    # p-value при нулевой гипотезе об отсутствии связи (для корреляций) или о равенстве
+    # распределений (для разности средних). Исходная выборка считается одной из перестановок,
+    # поэтому p-value не бывает нулевым: (k + 1) / (replicates + 1)
+    x, y, values = _replicates(_permutation_block, x, y, statistic, replicates, block, workers, seed)
+    observed = estimate(x, y, statistic)
+    # Допуск на ошибки округления, чтобы реплики, равные наблюдаемому значению, засчитывались
+    tolerance = 1e-12 * max(abs(observed), 1.0)
+    if alternative == "two-sided":
+        extreme = np.abs(values) >= abs(observed) - tolerance
+    elif alternative == "greater":
+        extreme = values >= observed - tolerance
+    elif alternative == "less":
+        extreme = values <= observed + tolerance
+    else:
+        raise ValueError(f"Неизвестная альтернатива: {alternative}")
+    return {
+        "statistic": statistic,
+        "estimate": observed,
+        "p_value": (int(extreme.sum()) + 1) / (replicates + 1),
+        "replicates": replicates,
+    }
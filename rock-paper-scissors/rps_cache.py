@@ -0,0 +1,62 @@
+# Хранилище результатов турнира на диске (JSON Lines).
+# Результат пары агентов хранится по ключу из отпечатков классов агентов и движка,
+# количества шагов, зерна турнира и остальных настроек матча,
+# поэтому при добавлении нового агента переигрываются только его пары,
+# а при изменении движка (правил, досрочной остановки) - все пары
+import hashlib
+import inspect
+import json
+import os
+
+import rps_engine
+
+
+def agent_fingerprint(agent_type):
+    # Отпечаток агента - хеш исходного кода его класса.
+    # Любое изменение кода класса делает старые результаты недействительными
+    try:
+        source = inspect.getsource(agent_type)
+    except (OSError, TypeError):
+        source = agent_type.__qualname__  # исходный код недоступен (например, в интерпретаторе)
+    return hashlib.sha1(f"{agent_type.__qualname__}\n{source}".encode("utf-8")).hexdigest()
+
+
+def engine_fingerprint():
+    # Отпечаток движка - хеш исходного кода модуля rps_engine
+    return hashlib.sha1(inspect.getsource(rps_engine).encode("utf-8")).hexdigest()
+
+
+ENGINE_FINGERPRINT = engine_fingerprint()
+
+
+class ResultCache:
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        # Загружаем ранее сохранённые результаты, более поздние записи перекрывают ранние
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.results[record['key']] = record['result']
+
+    @staticmethod
+    def key(left_fingerprint, right_fingerprint, episodes, seed, games=1, stopping=None, round_index=None):
+        # Настройки досрочной остановки тоже влияют на результат, поэтому входят в ключ.
+        # round_index - номер тура для повторных встреч пары (швейцарская система, рейтинговые туры)
+        stopping_settings = sorted(vars(stopping).items()) if stopping is not None else None
+        key = [ENGINE_FINGERPRINT, left_fingerprint, right_fingerprint, episodes, seed, games, stopping_settings]
+        if round_index is not None:
+            key.append(round_index)
+        return json.dumps(key)
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def add(self, key, result):
+        # Профиль агентов не сохраняется: турниры с профилировщиком кеш не используют
+        result = {'results': result['results'], 'steps_saved': result['steps_saved'], 'profile': None}
+        self.results[key] = result
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({'key': key, 'result': result}) + "\n")
@@ -0,0 +1,232 @@
+# Встроенный движок игры "камень-ножницы-бумага"
+# Играет N партий одновременно (в ногу) на массивах NumPy
+# и возвращает результат в том же формате, что и kaggle_environments.evaluate
+import copy
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+# Конфигурация по умолчанию совпадает с окружением "rps" из Kaggle
+DEFAULT_CONFIGURATION = {
+    'episodeSteps': 1000,
+    'signs': 3,
+}
+
+
+def get_score(left_actions, right_actions):
+    # Векторная версия правила Kaggle: 1 - выиграл левый, -1 - правый, 0 - ничья
+    delta = np.where(
+        (left_actions + right_actions) % 2 == 0,
+        right_actions - left_actions,
+        left_actions - right_actions,
+    )
+    return np.sign(delta)
+
+
+class CallAdapter:
+    # Адаптер для обычных агентов с интерфейсом __call__(observation, configuration).
+    # Для каждой партии нужен свой экземпляр агента, иначе агенты с состоянием
+    # будут смешивать историю разных партий
+    def __init__(self, agent, games):
+        if games == 1:
+            self.instances = [agent]
+        else:
+            self.instances = [copy.deepcopy(agent) for _ in range(games)]
+
+    def batch(self, observation, configuration):
+        actions = np.empty(len(self.instances), dtype=np.int64)
+        for game, instance in enumerate(self.instances):
+            game_observation = SimpleNamespace(step=observation.step)
+            if observation.step > 0:
+                game_observation.lastOpponentAction = int(observation.lastOpponentAction[game])
+            actions[game] = instance(game_observation, configuration)
+        return actions
+
+
+def as_batched(agent, games):
+    # Агенты с методом batch работают сразу с вектором партий, остальных оборачиваем
+    if hasattr(agent, 'batch'):
+        return agent
+    return CallAdapter(agent, games)
+
+
+class SequentialTest:
+    # Последовательный критерий отношения правдоподобия (SPRT) для досрочной остановки партии.
+    # p - средний результат хода для левого агента (выигрыш 1, ничья 0.5, проигрыш 0).
+    # Гипотеза "ничья" p = 0.5 сравнивается с гипотезами p = 0.5 + margin (сильнее левый)
+    # и p = 0.5 - margin (сильнее правый); партия останавливается, как только одна из них принята.
+    # Партия, остановленная на принятии гипотезы "ничья", записывается как ничья (награда 0).
+    # Для партий, где принята победа одного из агентов: project=True - результат пересчитывается
+    # на полную длину, иначе сохраняется фактический (частичный) счёт
+    def __init__(self, confidence=0.99, margin=0.1, project=False):
+        error = 1 - confidence
+        self.upper = np.log((1 - error) / error)  # принять победу одного из агентов
+        self.lower = np.log(error / (1 - error))  # принять ничью
+        self.win_weight = np.log((0.5 + margin) / 0.5)
+        self.loss_weight = np.log((0.5 - margin) / 0.5)
+        self.project = project
+
+    def decided(self, wins, losses, draws):
+        # Возвращает две маски: принята победа одного из агентов и принята ничья
+        wins = wins + draws / 2
+        losses = losses + draws / 2
+        left_better = wins * self.win_weight + losses * self.loss_weight
+        right_better = losses * self.win_weight + wins * self.loss_weight
+        ratio = np.maximum(left_better, right_better)
+        return ratio >= self.upper, ratio <= self.lower
+
+
+class Profiler:
+    # Настройки профилирования агентов.
+    # budget - бюджет времени на ход в секундах (как actTimeout в Kaggle),
+    # forfeit=True - агент, превысивший бюджет, проигрывает все оставшиеся ходы партии
+    # и больше не вызывается, memory=True - учитывать выделения памяти (tracemalloc)
+    def __init__(self, budget=None, forfeit=False, memory=False):
+        self.budget = budget
+        self.forfeit = forfeit
+        self.memory = memory
+
+    def wrap(self, agent):
+        return ProfiledAgent(agent, self.budget, self.forfeit)
+
+
+class ProfiledAgent:
+    # Обёртка пакетного агента: замеряет время каждого хода и выделенную память,
+    # отмечает превышения бюджета времени на ход. Один вызов batch делает ход сразу во всех
+    # партиях, поэтому время хода - время вызова, делённое на количество партий
+    def __init__(self, agent, budget=None, forfeit=False):
+        self.agent = agent
+        self.budget = budget
+        self.forfeit = forfeit
+        self.times = []  # время хода в одной партии
+        self.total = 0.0  # общее время вызовов
+        self.allocated = 0
+        self.overruns = 0
+        self.forfeited = False
+
+    def batch(self, observation, configuration):
+        if self.forfeited:
+            return 0  # агент уже проиграл по времени, больше его не вызываем
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            memory_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        actions = self.agent.batch(observation, configuration)
+        elapsed = time.perf_counter() - start
+        if tracing:
+            self.allocated += tracemalloc.get_traced_memory()[1] - memory_before
+        self.total += elapsed
+        elapsed /= observation.games
+        self.times.append(elapsed)
+        if self.budget is not None and elapsed > self.budget:
+            self.overruns += 1
+            self.forfeited = self.forfeit
+        return actions
+
+    def stats(self):
+        return {'times': self.times, 'total': self.total, 'allocated': self.allocated, 'overruns': self.overruns}
+
+
+def play(agents, configuration=None, num_episodes=1, rng=None, stopping=None):
+    # Играет num_episodes партий между двумя агентами.
+    # Возвращает список [награда левого, награда правого] для каждой партии
+    rewards, _ = run(agents, configuration, num_episodes, rng, stopping)
+    return [[int(reward), int(-reward)] for reward in rewards]
+
+
+def run(agents, configuration=None, num_episodes=1, rng=None, stopping=None):
+    # Возвращает массив наград левого агента и количество сыгранных шагов в каждой партии.
+    # stopping - критерий досрочной остановки (например, SequentialTest)
+    config = SimpleNamespace(**{**DEFAULT_CONFIGURATION, **(configuration or {})})
+    # Генератор случайных чисел для пакетных агентов
+    config.rng = rng if rng is not None else np.random.default_rng()
+
+    left, right = (as_batched(agent, num_episodes) for agent in agents)
+    rewards = np.zeros(num_episodes, dtype=np.int64)
+    wins = np.zeros(num_episodes, dtype=np.int64)
+    losses = np.zeros(num_episodes, dtype=np.int64)
+    draws = np.zeros(num_episodes, dtype=np.int64)
+    steps_played = np.full(num_episodes, config.episodeSteps, dtype=np.int64)
+    active = np.ones(num_episodes, dtype=bool)  # партии, исход которых ещё не решён
+    drawn = np.zeros(num_episodes, dtype=bool)  # партии, остановленные с решением "ничья"
+    last_left = last_right = None
+
+    for step in range(config.episodeSteps):
+        left_actions = _act(left, step, last_right, num_episodes, config)
+        right_actions = _act(right, step, last_left, num_episodes, config)
+        score = get_score(left_actions, right_actions)
+        last_left, last_right = left_actions, right_actions
+
+        # Ход агента, проигравшего по времени, засчитывается как проигрыш
+        left_forfeited = getattr(left, 'forfeited', False)
+        right_forfeited = getattr(right, 'forfeited', False)
+        if left_forfeited or right_forfeited:
+            score = np.full_like(score, int(right_forfeited) - int(left_forfeited))
+
+        if stopping is None:
+            rewards += score
+            continue
+
+        # Остановленные партии доигрываются вместе с остальными, но счёт в них не меняется
+        score = np.where(active, score, 0)
+        rewards += score
+        wins += score > 0
+        losses += score < 0
+        draws += active & (score == 0)
+        decisive, equal = stopping.decided(wins, losses, draws)
+        finished = active & (decisive | equal)
+        drawn |= active & equal & ~decisive
+        steps_played[finished] = step + 1
+        active &= ~finished
+        if not active.any():
+            break
+
+    if stopping is not None:
+        if stopping.project:
+            rewards = np.rint(rewards * config.episodeSteps / steps_played).astype(np.int64)
+        # Агенты признаны равными по силе - частичный счёт не должен давать победу одному из них
+        rewards[drawn] = 0
+    return rewards, steps_played
+
+
+def play_pairing(prototypes, configuration, num_episodes, seed_sequence, stopping=None, profiler=None):
+    # Играет одну пару на свежих копиях агентов из справочника со своим зерном генератора.
+    # Копия сохраняет настройки экземпляра (аргументы конструктора и т.п.), но состояние
+    # не переходит из матча в матч. Функция объявлена на уровне модуля, чтобы её можно было
+    # отправить в пул процессов. Возвращает результаты партий, количество сэкономленных шагов
+    # и профиль агентов
+    random.seed(int(seed_sequence.generate_state(1)[0]))  # для агентов, использующих модуль random
+    agents = [as_batched(copy.deepcopy(prototype), num_episodes) for prototype in prototypes]
+
+    tracing = profiler is not None and profiler.memory and not tracemalloc.is_tracing()
+    if profiler is not None:
+        agents = [profiler.wrap(agent) for agent in agents]
+    if tracing:
+        tracemalloc.start()
+    try:
+        rewards, steps_played = run(agents, configuration, num_episodes, np.random.default_rng(seed_sequence), stopping)
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    config = {**DEFAULT_CONFIGURATION, **(configuration or {})}
+    return {
+        'results': [[int(reward), int(-reward)] for reward in rewards],
+        # Остановленные партии доигрываются в ногу с остальными (агенты вызываются для всех партий),
+        # поэтому экономия - только шаги после остановки последней партии, во всех партиях пары
+        'steps_saved': int((config['episodeSteps'] - steps_played.max()) * num_episodes),
+        'profile': [agent.stats() for agent in agents] if profiler is not None else None,
+    }
+
+
+def _act(agent, step, last_opponent_actions, games, configuration):
+    observation = SimpleNamespace(step=step, games=games, lastOpponentAction=last_opponent_actions)
+    # Пакетный агент может вернуть одно число - оно применяется ко всем партиям
+    actions = np.broadcast_to(np.asarray(agent.batch(observation, configuration), dtype=np.int64), (games,))
+    if ((actions < 0) | (actions >= configuration.signs)).any():
+        raise ValueError(f"Недопустимое действие агента на шаге {step}: {actions}")
+    return actions
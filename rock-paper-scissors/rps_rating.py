@@ -0,0 +1,68 @@
+# Рейтинг агентов в стиле TrueSkill для турниров с большим числом участников.
+# Рейтинг агента - пара (mu, sigma): оценка силы и её неопределённость
+import math
+from statistics import NormalDist
+
+NORMAL = NormalDist()
+
+
+class TrueSkill:
+    # Значения по умолчанию совпадают с классическим TrueSkill
+    def __init__(self, mu=25.0, sigma=25.0 / 3, beta=25.0 / 6, tau=25.0 / 300, draw_probability=0.1):
+        self.mu = mu
+        self.sigma = sigma
+        self.beta = beta
+        self.tau = tau  # прирост неопределённости между матчами
+        # Ширина зоны ничьей для матча двух игроков
+        self.draw_margin = NORMAL.inv_cdf((draw_probability + 1) / 2) * math.sqrt(2) * beta
+
+    def create(self):
+        return self.mu, self.sigma
+
+    def rate(self, winner, loser, drawn=False):
+        # Обновляет рейтинги после матча, возвращает новые (winner, loser)
+        winner_mu, winner_sigma = winner[0], math.hypot(winner[1], self.tau)
+        loser_mu, loser_sigma = loser[0], math.hypot(loser[1], self.tau)
+
+        c = math.sqrt(2 * self.beta ** 2 + winner_sigma ** 2 + loser_sigma ** 2)
+        t = (winner_mu - loser_mu) / c
+        epsilon = self.draw_margin / c
+        v, w = self.__draw_factors(t, epsilon) if drawn else self.__win_factors(t, epsilon)
+
+        winner = (winner_mu + winner_sigma ** 2 / c * v,
+                  winner_sigma * math.sqrt(max(1 - winner_sigma ** 2 / c ** 2 * w, 1e-6)))
+        loser = (loser_mu - loser_sigma ** 2 / c * v,
+                 loser_sigma * math.sqrt(max(1 - loser_sigma ** 2 / c ** 2 * w, 1e-6)))
+        return winner, loser
+
+    def quality(self, left, right):
+        # Вероятность ничьей в матче: чем ближе к 1, тем равнее соперники
+        c2 = 2 * self.beta ** 2 + left[1] ** 2 + right[1] ** 2
+        return math.sqrt(2 * self.beta ** 2 / c2) * math.exp(-(left[0] - right[0]) ** 2 / (2 * c2))
+
+    @staticmethod
+    def conservative(rating):
+        # Консервативная оценка силы (нижняя граница), используется для сортировки
+        return rating[0] - 3 * rating[1]
+
+    @staticmethod
+    def __win_factors(t, epsilon):
+        denominator = NORMAL.cdf(t - epsilon)
+        if denominator < 1e-12:
+            # Очень неожиданная победа: используем асимптотику
+            v = epsilon - t
+        else:
+            v = NORMAL.pdf(t - epsilon) / denominator
+        return v, v * (v + t - epsilon)
+
+    @staticmethod
+    def __draw_factors(t, epsilon):
+        # Формулы симметричны, поэтому считаем для |t| и возвращаем знак
+        sign = -1 if t < 0 else 1
+        t = abs(t)
+        denominator = NORMAL.cdf(epsilon - t) - NORMAL.cdf(-epsilon - t)
+        if denominator < 1e-12:
+            return -sign * (t - epsilon), 1.0
+        v = (NORMAL.pdf(-epsilon - t) - NORMAL.pdf(epsilon - t)) / denominator
+        w = v ** 2 + ((epsilon - t) * NORMAL.pdf(epsilon - t) + (epsilon + t) * NORMAL.pdf(epsilon + t)) / denominator
+        return sign * v, w
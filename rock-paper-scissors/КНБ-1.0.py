@@ -1,15 +1,24 @@
 # Импорт необходимых библиотек
+# Argparse, csv и json для запуска из командной строки и выгрузки результатов
+import argparse
+import csv
+import json
+import math
+import sys
 # NumPy для работы с массивами
 import numpy as np
-# Pandas для работы с табличными данными
-import pandas as pd
 # Random для случайного выбора
 import random
-# Matplotlib и Seaborn для визуализации результатов
-import matplotlib.pyplot as plt
-import seaborn as sns
-# Kaggle Environments для симуляции игры
-from kaggle_environments import make, evaluate
+# Пул процессов для параллельного проведения турнира
+from concurrent.futures import ProcessPoolExecutor
+# Pandas, Matplotlib и Seaborn импортируются только там, где нужны (таблицы и графики),
+# чтобы турнир без графиков запускался быстро и не требовал графической подсистемы
+# Встроенный движок для симуляции игры
+from rps_engine import Profiler, SequentialTest, play_pairing
+# Кеш результатов пар агентов на диске
+from rps_cache import ResultCache, agent_fingerprint
+# Рейтинг агентов для швейцарской системы и рейтинговых туров
+from rps_rating import TrueSkill
 
 
 # Определяем агентов в классовом формате для удобства использования
@@ -18,16 +27,25 @@ class RockAgent:
     def __call__(self, observation, configuration):
         return 0  # всегда выбирает камень (0)
 
+    def batch(self, observation, configuration):
+        return 0  # одно и то же действие во всех партиях
+
 
 class PaperAgent:
     def __call__(self, observation, configuration):
         return 1  # всегда выбирает бумагу (1)
 
+    def batch(self, observation, configuration):
+        return 1  # одно и то же действие во всех партиях
+
 
 class ScissorsAgent:
     def __call__(self, observation, configuration):
         return 2  # всегда выбирает ножницы (2)
 
+    def batch(self, observation, configuration):
+        return 2  # одно и то же действие во всех партиях
+
 
 class CopyAgent:
     def __call__(self, observation, configuration):
@@ -36,6 +54,11 @@ class CopyAgent:
             return observation.lastOpponentAction
         return random.randrange(0, configuration.signs)  # Случайный выбор в первом раунде
 
+    def batch(self, observation, configuration):
+        if observation.step > 0:
+            return observation.lastOpponentAction
+        return configuration.rng.integers(0, configuration.signs, observation.games)
+
 
 class ReactionaryAgent:
     def __call__(self, observation, configuration):
@@ -45,6 +68,11 @@ class ReactionaryAgent:
         # Выбирает действие, которое бьет последнее действие противника
         return (observation.lastOpponentAction + 1) % configuration.signs
 
+    def batch(self, observation, configuration):
+        if observation.step == 0:
+            return configuration.rng.integers(0, configuration.signs, observation.games)
+        return (observation.lastOpponentAction + 1) % configuration.signs
+
 
 class ContrReactionaryAgent:
     def __init__(self):
@@ -62,6 +90,11 @@ class MonotonousAgent:
         return observation.step % configuration.signs if observation.step > 0 else random.randrange(0,
                                                                                                     configuration.signs)
 
+    def batch(self, observation, configuration):
+        if observation.step > 0:
+            return observation.step % configuration.signs
+        return configuration.rng.integers(0, configuration.signs, observation.games)
+
 
 class StatisticalAgent:
     def __init__(self):
@@ -86,22 +119,34 @@ class RandomChoiceAgent:
         # Совершает случайный выбор
         return random.randrange(0, configuration.signs)
 
+    def batch(self, observation, configuration):
+        return configuration.rng.integers(0, configuration.signs, observation.games)
+
 
 # Новые агенты, добавляем больше стратегий:
 class AlwaysScissorsAgent:
     def __call__(self, observation, configuration):
         return 2  # всегда выбирает ножницы
 
+    def batch(self, observation, configuration):
+        return 2  # одно и то же действие во всех партиях
+
 
 class AlwaysRockAgent:
     def __call__(self, observation, configuration):
         return 0  # всегда выбирает камень
 
+    def batch(self, observation, configuration):
+        return 0  # одно и то же действие во всех партиях
+
 
 class AlwaysPaperAgent:
     def __call__(self, observation, configuration):
         return 1  # всегда выбирает бумагу
 
+    def batch(self, observation, configuration):
+        return 1  # одно и то же действие во всех партиях
+
 
 class AlternatingAgent:
     def __init__(self):
@@ -131,9 +176,14 @@ class StreakBreakerAgent:
 
 class RandomSwitchAgent:
     def __init__(self):
-        self.last_action = random.randrange(0, 3)  # Случайный выбор в начале
+        # Начальное действие выбирается при первом ходе, а не в конструкторе: турнир играет
+        # на копиях экземпляра из справочника, и каждая копия должна выбрать его сама
+        # со своим зерном пары
+        self.last_action = None
 
     def __call__(self, observation, configuration):
+        if self.last_action is None:
+            self.last_action = random.randrange(0, 3)  # Случайный выбор в начале
         if random.random() < 0.5:
             self.last_action = (self.last_action + 1) % 3  # Случайное переключение
         return self.last_action  # Возвращает последнее действие
@@ -145,6 +195,11 @@ class CopyLastMoveAgent:
             return observation.lastOpponentAction  # Повторяет последнее действие противника
         return random.randrange(0, configuration.signs)  # Случайный выбор для первого раунда
 
+    def batch(self, observation, configuration):
+        if observation.step > 0:
+            return observation.lastOpponentAction
+        return configuration.rng.integers(0, configuration.signs, observation.games)
+
 
 class RandomSavvyAgent:
     def __call__(self, observation, configuration):
@@ -153,6 +208,12 @@ class RandomSavvyAgent:
         # Случайное действие, чтобы изменять стратегию
         return (observation.lastOpponentAction + random.randint(0, 2)) % configuration.signs
 
+    def batch(self, observation, configuration):
+        shift = configuration.rng.integers(0, 3, observation.games)
+        if observation.step == 0:
+            return shift % configuration.signs
+        return (observation.lastOpponentAction + shift) % configuration.signs
+
 
 class MajorityVoteAgent:
     def __init__(self):
@@ -181,6 +242,11 @@ class SlowLearnerAgent:
             return random.randrange(0, configuration.signs)
         return (observation.lastOpponentAction + 1) % configuration.signs  # Каждую итерацию бьет последнее действие
 
+    def batch(self, observation, configuration):
+        if observation.step == 0 or (observation.step % 5) == 0:
+            return configuration.rng.integers(0, configuration.signs, observation.games)
+        return (observation.lastOpponentAction + 1) % configuration.signs
+
 
 # Справочник агентов
 agents = {
@@ -207,13 +273,21 @@ agents = {
 
 
 class Tournament:
-    def __init__(self, agents):
+    def __init__(self, agents, seed=None):
         self.agents = agents  # Сохраняем список агентов
+        # Зерно турнира: из него получается отдельное зерно для каждой пары агентов
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
         # Инициализация результата для каждого агента
         self.results = {agent: {'episodes_sum': 0, 'points': 0} for agent in agents}
-
-    def __save_result(self, round_result, left, right):
-        left_wins, right_wins = round_result[0]  # Успехи агентов в раунде
+        # Количество шагов, сэкономленных досрочной остановкой, для каждой пары агентов
+        self.steps_saved = {}
+        # Профиль агентов (заполняется, если турнир запущен с профилировщиком)
+        self.profile = {}
+        # Рейтинги агентов (mu, sigma) для швейцарской системы и рейтинговых туров
+        self.ratings = {}
+
+    def __save_result(self, game_result, left, right):
+        left_wins, right_wins = game_result  # Успехи агентов в партии
         self.results[left]['episodes_sum'] += left_wins
         self.results[right]['episodes_sum'] += right_wins
 
@@ -226,33 +300,240 @@ class Tournament:
             self.results[left]['points'] += 1  # Ничья
             self.results[right]['points'] += 1
 
-    def start(self, episodes):
-        # Запускает турнир для всех агентов
+    def start(self, episodes, games=1, workers=1, stopping=None, profiler=None, cache=None):
+        # Запускает турнир для всех агентов (круговая система)
+        # games - количество партий, которые каждая пара играет одновременно
+        # workers - количество процессов (1 - последовательно, None - все ядра)
+        # stopping - критерий досрочной остановки партий (например, SequentialTest)
+        # profiler - профилирование агентов и бюджет времени на ход (Profiler)
+        # cache - хранилище результатов (ResultCache): сыгранные ранее пары не переигрываются
+        # (вместе с profiler кеш не читается и не пополняется)
         names = list(self.agents.keys())
         num_agents = len(names)
 
+        pairs = []
         for i in range(num_agents - 1):
             for j in range(i + 1, num_agents):
-                left, right = names[i], names[j]  # Выбор двух агентов для игры
-                round_result = evaluate(
-                    "rps",  # Оценка игры "Камень, ножницы, бумага"
-                    [self.agents[left], self.agents[right]],
-                    configuration={"episodeSteps": episodes},  # Количество шагов в эпизоде
-                )
-                self.__save_result(round_result, left, right)  # Сохранение результата игры
+                pairs.append((names[i], names[j]))  # Выбор двух агентов для игры
 
-    def print_result(self):
-        # Сортировка и вывод результатов по очкам и сумме выигрышей
+        self.__play(pairs, episodes, games, workers, stopping, profiler, cache)
+
+    def start_swiss(self, episodes, rounds=None, rating=None, **options):
+        # Швейцарская система: в каждом туре встречаются агенты с близким числом очков,
+        # повторные встречи по возможности исключаются. По умолчанию ceil(log2(n)) туров,
+        # то есть O(n log n) матчей вместо O(n^2) при круговой системе.
+        # При нечётном числе агентов один агент в туре пропускает игру и получает очки за победу.
+        # options - те же настройки, что и у start (games, workers, stopping, profiler, cache)
+        rating = self.__init_ratings(rating)
+        names = list(self.agents.keys())
+        rounds = rounds if rounds is not None else max(1, math.ceil(math.log2(len(names))))
+        played = set()
+
+        for round_index in range(rounds):
+            # Сортировка по очкам, при равенстве - по рейтингу
+            standings = sorted(names, key=lambda name: (self.results[name]['points'],
+                                                        rating.conservative(self.ratings[name])), reverse=True)
+            if len(standings) % 2:
+                # Пропускает тур агент с наименьшим числом очков, ещё не пропускавший туров
+                bye = next((name for name in reversed(standings) if (name, None) not in played), standings[-1])
+                played.add((bye, None))
+                standings.remove(bye)
+                self.results[bye]['points'] += 2
+
+            pairs = []
+            while standings:
+                left = standings.pop(0)
+                # Ближайший по таблице соперник, с которым агент ещё не играл
+                opponent = next((name for name in standings if frozenset((left, name)) not in played), standings[0])
+                standings.remove(opponent)
+                played.add(frozenset((left, opponent)))
+                pairs.append((left, opponent))
+
+            round_results = self.__play(pairs, episodes, round_index=round_index, **options)
+            self.__update_ratings(rating, pairs, round_results)
+
+    def start_rated(self, episodes, rounds=None, rating=None, **options):
+        # Адаптивный подбор соперников по рейтингу (TrueSkill): в каждом туре агенты
+        # сортируются по оценке силы и играют с соседом, с которым матч наиболее равный.
+        # По умолчанию 2 * ceil(log2(n)) туров по n/2 матчей - O(n log n) матчей.
+        # options - те же настройки, что и у start (games, workers, stopping, profiler, cache)
+        rating = self.__init_ratings(rating)
+        names = list(self.agents.keys())
+        rounds = rounds if rounds is not None else 2 * max(1, math.ceil(math.log2(len(names))))
+        last_opponent = {}
+
+        for round_index in range(rounds):
+            standings = sorted(names, key=lambda name: self.ratings[name][0], reverse=True)
+            pairs = []
+            while len(standings) > 1:
+                left = standings.pop(0)
+                # Среди ближайших по силе агентов выбираем самый равный матч,
+                # не повторяя соперника из предыдущего тура
+                candidates = [name for name in standings[:3] if last_opponent.get(left) != name] or standings[:1]
+                opponent = max(candidates, key=lambda name: rating.quality(self.ratings[left], self.ratings[name]))
+                standings.remove(opponent)
+                last_opponent[left], last_opponent[opponent] = opponent, left
+                pairs.append((left, opponent))
+
+            round_results = self.__play(pairs, episodes, round_index=round_index, **options)
+            self.__update_ratings(rating, pairs, round_results)
+
+    def __init_ratings(self, rating):
+        # Начальные рейтинги агентов и столбцы rating/uncertainty в результатах
+        rating = rating if rating is not None else TrueSkill()
+        self.ratings = {name: rating.create() for name in self.agents}
+        for name in self.agents:
+            self.__save_rating(rating, name)
+        return rating
+
+    def __update_ratings(self, rating, pairs, round_results):
+        for (left, right), round_result in zip(pairs, round_results):
+            for left_wins, right_wins in round_result['results']:
+                if left_wins >= right_wins:
+                    self.ratings[left], self.ratings[right] = rating.rate(
+                        self.ratings[left], self.ratings[right], drawn=left_wins == right_wins)
+                else:
+                    self.ratings[right], self.ratings[left] = rating.rate(self.ratings[right], self.ratings[left])
+            self.__save_rating(rating, left)
+            self.__save_rating(rating, right)
+
+    def __save_rating(self, rating, name):
+        mu, sigma = self.ratings[name]
+        self.results[name]['rating'] = round(mu, 3)
+        self.results[name]['uncertainty'] = round(sigma, 3)
+
+    def __play(self, pairs, episodes, games=1, workers=1, stopping=None, profiler=None, cache=None,
+               round_index=None):
+        # Играет список пар агентов и сохраняет результаты, возвращает результаты пар.
+        # round_index - номер тура, чтобы повторные встречи пары игрались с другим зерном
+
+        # Каждая пара играет на копиях экземпляров из справочника, чтобы состояние
+        # не переходило из матча в матч, и со своим детерминированным зерном.
+        # Зерно пары зависит от отпечатков агентов, а не от их позиции в списке,
+        # поэтому результат пары не меняется при добавлении новых агентов
+        fingerprints = {name: agent_fingerprint(type(self.agents[name])) for pair in pairs for name in pair}
+        # С профилировщиком кеш не используется: профиль есть только у реально сыгранных пар,
+        # а при forfeit результат зависит от скорости агентов и не воспроизводится по зерну
+        if profiler is not None:
+            cache = None
+        keys = [ResultCache.key(fingerprints[left], fingerprints[right], episodes, self.seed, games, stopping,
+                                round_index)
+                for left, right in pairs]
+        # Из кеша берутся только уже сыгранные пары, остальные играются заново
+        round_results = [cache.get(key) if cache is not None else None for key in keys]
+        missing = [index for index, round_result in enumerate(round_results) if round_result is None]
+
+        prototypes = [(self.agents[pairs[index][0]], self.agents[pairs[index][1]]) for index in missing]
+        configurations = [{"episodeSteps": episodes}] * len(missing)  # Количество шагов в эпизоде
+        seeds = []
+        for index in missing:
+            left, right = pairs[index]
+            spawn_key = (int(fingerprints[left][:8], 16), int(fingerprints[right][:8], 16))
+            if round_index is not None:
+                spawn_key += (round_index,)
+            seeds.append(np.random.SeedSequence(self.seed, spawn_key=spawn_key))
+        tasks = (prototypes, configurations, [games] * len(missing), seeds,
+                 [stopping] * len(missing), [profiler] * len(missing))
+
+        if workers == 1:
+            played = list(map(play_pairing, *tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                played = list(executor.map(play_pairing, *tasks))
+
+        for index, round_result in zip(missing, played):
+            round_results[index] = round_result
+            if cache is not None:
+                cache.add(keys[index], round_result)
+
+        # Результаты сохраняются в том же порядке, что и при последовательном запуске
+        for (left, right), round_result in zip(pairs, round_results):
+            for game_result in round_result['results']:
+                self.__save_result(game_result, left, right)  # Сохранение результата игры
+            self.steps_saved[(left, right)] = self.steps_saved.get((left, right), 0) + round_result['steps_saved']
+            if round_result['profile'] is not None:
+                self.__save_profile(round_result['profile'], left, right)
+        return round_results
+
+    def __save_profile(self, round_profile, left, right):
+        # Объединяет замеры агентов по всем сыгранным парам
+        for name, stats in zip((left, right), round_profile):
+            profile = self.profile.setdefault(name, {'times': [], 'total': 0.0, 'allocated': 0, 'overruns': 0})
+            profile['times'].extend(stats['times'])
+            profile['total'] += stats['total']
+            profile['allocated'] += stats['allocated']
+            profile['overruns'] += stats['overruns']
+
+    def profile_table(self):
+        # Таблица профиля агентов: число вызовов, общее время, p50/p99 времени хода в одной партии,
+        # выделенная память и число превышений бюджета времени
+        import pandas as pd
+
+        rows = []
+        for name, profile in self.profile.items():
+            times = np.array(profile['times'])
+            rows.append({
+                'agent': name,
+                'calls': len(times),
+                'total_time': profile['total'],
+                'p50': np.percentile(times, 50) if len(times) else 0.0,
+                'p99': np.percentile(times, 99) if len(times) else 0.0,
+                'allocated': profile['allocated'],
+                'overruns': profile['overruns'],
+            })
+        return pd.DataFrame(rows).sort_values('total_time', ascending=False)
+
+    def print_steps_saved(self):
+        # Вывод количества шагов, сэкономленных досрочной остановкой
+        for (left, right), steps_saved in self.steps_saved.items():
+            print(f"{left} - {right}: {steps_saved}")
+        print("Всего сэкономлено шагов:", sum(self.steps_saved.values()))
+
+    def rankings(self):
+        # Сортировка результатов по очкам и по сумме выигрышей
         sorted_by_points = sorted(self.results.items(), key=lambda item: (item[1]['points'], item[1]['episodes_sum']),
                                   reverse=True)
         sorted_by_episodes = sorted(self.results.items(), key=lambda item: (item[1]['episodes_sum'], item[1]['points']),
                                     reverse=True)
+        return sorted_by_points, sorted_by_episodes
+
+    def print_result(self):
+        # Вывод результатов по очкам и сумме выигрышей в виде графиков
+        sorted_by_points, sorted_by_episodes = self.rankings()
+
+        self.__plot_results(sorted_by_points, 'points', 'Очки', 'По очкам')
+        self.__plot_results(sorted_by_episodes, 'episodes_sum', 'Сумма выигрышей по эпизодам', 'По эпизодам')
+
+    def export_result(self, file, output_format):
+        # Выгрузка рейтингов без графиков: output_format - "csv", "json" или "table"
+        sorted_by_points, sorted_by_episodes = self.rankings()
+        if output_format == 'json':
+            json.dump({
+                'sorted_by_points': [{'agent': name, **result} for name, result in sorted_by_points],
+                'sorted_by_episodes': [{'agent': name, **result} for name, result in sorted_by_episodes],
+            }, file, ensure_ascii=False, indent=2)
+            file.write("\n")
+        elif output_format == 'csv':
+            rank_by_episodes = {name: rank for rank, (name, _) in enumerate(sorted_by_episodes, start=1)}
+            # Столбцы rating/uncertainty есть только после швейцарской системы или рейтинговых туров
+            columns = list(sorted_by_points[0][1]) if sorted_by_points else ['episodes_sum', 'points']
+            writer = csv.writer(file)
+            writer.writerow(['agent', *columns, 'rank_by_points', 'rank_by_episodes'])
+            for rank, (name, result) in enumerate(sorted_by_points, start=1):
+                writer.writerow([name, *(result[column] for column in columns), rank, rank_by_episodes[name]])
+        elif output_format == 'table':
+            for rank, (name, result) in enumerate(sorted_by_points, start=1):
+                file.write(f"{rank:>3} {name:<20} {result['points']:>6} {result['episodes_sum']:>8}\n")
+        else:
+            raise ValueError(f"Неизвестный формат выгрузки: {output_format}")
 
-        self.__plot_results(sorted_by_points, 'Очки', 'По очкам')
-        self.__plot_results(sorted_by_episodes, 'Сумма выигрышей по эпизодам', 'По эпизодам')
+    def __plot_results(self, sorted_results, metric, ylabel, title):
+        import matplotlib.pyplot as plt
+        import pandas as pd
+        import seaborn as sns
 
-    def __plot_results(self, sorted_results, ylabel, title):
-        agents, metrics = zip(*sorted_results)  # Распаковываем отсортированные результаты
+        agents, results = zip(*sorted_results)  # Распаковываем отсортированные результаты
+        metrics = [result[metric] for result in results]
         df = pd.DataFrame({"agent": agents, ylabel: metrics})  # Создание DataFrame для визуализации
 
         # Визуализация результатов
@@ -265,7 +546,71 @@ class Tournament:
         plt.show()  # Показать график
 
 
-# Запуск турнира
-tournament = Tournament(agents)  # Создаем экземпляр турнира
-tournament.start(1000)  # Запуск турнира на 1000 эпизодов
-tournament.print_result()  # Вывод результатов
+# Зерно турнира по умолчанию при запуске с кешем результатов
+CACHE_SEED = 0
+
+
+def main(argv=None):
+    # Запуск турнира из командной строки
+    parser = argparse.ArgumentParser(description="Турнир агентов игры камень-ножницы-бумага")
+    parser.add_argument('--agents', help="список агентов через запятую (по умолчанию - все)")
+    parser.add_argument('--episodes', type=int, default=1000, help="количество шагов в партии")
+    parser.add_argument('--games', type=int, default=1, help="количество партий для каждой пары")
+    parser.add_argument('--workers', type=int, default=1, help="количество процессов (0 - все ядра)")
+    parser.add_argument('--seed', type=int,
+                        help=f"зерно турнира (по умолчанию случайное, с --cache - {CACHE_SEED})")
+    parser.add_argument('--sprt', type=float, metavar='CONFIDENCE',
+                        help="досрочная остановка партий с заданной достоверностью, например 0.99")
+    parser.add_argument('--cache', help="файл с кешем результатов пар агентов")
+    parser.add_argument('--profile', metavar='FILE', help="выгрузить профиль агентов (CSV) в файл")
+    parser.add_argument('--move-budget', type=float, metavar='SECONDS',
+                        help="бюджет времени на ход; агент, превысивший его, проигрывает оставшиеся ходы")
+    parser.add_argument('--schedule', choices=['round-robin', 'swiss', 'rated'], default='round-robin',
+                        help="система проведения турнира")
+    parser.add_argument('--rounds', type=int, help="количество туров для швейцарской системы и рейтинговых туров")
+    parser.add_argument('--format', choices=['plot', 'table', 'csv', 'json'], default='plot',
+                        help="формат вывода результатов")
+    parser.add_argument('--output', help="файл для выгрузки результатов (по умолчанию - стандартный вывод)")
+    args = parser.parse_args(argv)
+
+    selected = agents
+    if args.agents:
+        names = [name.strip() for name in args.agents.split(',')]
+        unknown = [name for name in names if name not in agents]
+        if unknown:
+            parser.error(f"неизвестные агенты: {', '.join(unknown)}")
+        selected = {name: agents[name] for name in names}
+
+    # Зерно входит в ключ кеша, поэтому со случайным зерном кеш никогда бы не срабатывал
+    seed = args.seed if args.seed is not None or not args.cache else CACHE_SEED
+    tournament = Tournament(selected, seed=seed)  # Создаем экземпляр турнира
+    options = {
+        'games': args.games,
+        'workers': args.workers or None,
+        'stopping': SequentialTest(args.sprt) if args.sprt else None,
+        'cache': ResultCache(args.cache) if args.cache else None,
+        'profiler': Profiler(args.move_budget, forfeit=args.move_budget is not None, memory=bool(args.profile))
+        if args.profile or args.move_budget is not None else None,
+    }
+    if args.schedule == 'swiss':
+        tournament.start_swiss(args.episodes, rounds=args.rounds, **options)
+    elif args.schedule == 'rated':
+        tournament.start_rated(args.episodes, rounds=args.rounds, **options)
+    else:
+        tournament.start(args.episodes, **options)
+
+    if args.format == 'plot':
+        tournament.print_result()  # Вывод результатов
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as file:
+            tournament.export_result(file, args.format)
+    else:
+        tournament.export_result(sys.stdout, args.format)
+
+    if args.profile:
+        tournament.profile_table().to_csv(args.profile, index=False)
+
+
+# Запуск турнира (под защитой __main__, чтобы процессы пула не запускали его повторно)
+if __name__ == "__main__":
+    main()
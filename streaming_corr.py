@@ -0,0 +1,151 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+from regression import iter_chunks
+
+# Корреляции Пирсона за один проход по данным.
+# Накапливаются количество, средние и центрированные суммы произведений (как в алгоритме Уэлфорда),
+# порции строк объединяются формулой Чана, поэтому результаты частей, посчитанных в разных
+# процессах, складываются без повторного прохода. По умолчанию считаются только корреляции
+# признаков с целевой переменной (O(p) памяти), полная матрица между признаками - по запросу (O(p^2)).
+
+# Сколько порций на процесс может одновременно ждать обработки в пуле
+PENDING_PER_WORKER = 2
+
+
+class CorrelationAccumulator:
+    def __init__(self, full=False):
+        self.full = full  # накапливать ли попарные суммы между признаками
+        self.count = 0
+        self.mean_x = None
+        self.mean_y = 0.0
+        self.m2_x = None  # суммы квадратов отклонений признаков
+        self.m2_y = 0.0
+        self.c_xy = None  # суммы произведений отклонений признаков и цели
+        self.c_xx = None  # то же для пар признаков (только при full)
+
+    def update(self, X, y=None):
+        # Добавляет порцию строк X (n x p) и, если задана, целевую переменную y (n)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[:, None]
+        if not len(X):
+            return self
+        chunk = CorrelationAccumulator(self.full)
+        chunk.count = len(X)
+        chunk.mean_x = X.mean(axis=0)
+        dx = X - chunk.mean_x
+        chunk.m2_x = np.einsum("ij,ij->j", dx, dx)
+        if y is not None:
+            y = np.asarray(y, dtype=np.float64).reshape(-1)
+            if len(y) != len(X):
+                raise ValueError(f"Разное количество строк в X и y: {len(X)} и {len(y)}")
+            chunk.mean_y = y.mean()
+            dy = y - chunk.mean_y
+            chunk.m2_y = dy @ dy
+            chunk.c_xy = dx.T @ dy
+        if self.full:
+            chunk.c_xx = dx.T @ dx
+        return self.merge(chunk)
+
+    def merge(self, other):
+        # Объединение двух накопителей (формула Чана для средних и сумм произведений отклонений)
+        if not other.count:
+            return self
+        if not self.count:
+            self.count = other.count
+            self.mean_x, self.mean_y = other.mean_x.copy(), other.mean_y
+            self.m2_x, self.m2_y = other.m2_x.copy(), other.m2_y
+            self.c_xy = None if other.c_xy is None else other.c_xy.copy()
+            self.c_xx = None if other.c_xx is None else other.c_xx.copy()
+            return self
+        if len(other.mean_x) != len(self.mean_x):
+            raise ValueError(f"Ожидалось {len(self.mean_x)} признаков, получено {len(other.mean_x)}")
+
+        count = self.count + other.count
+        weight = self.count * other.count / count
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        self.m2_x += other.m2_x + delta_x ** 2 * weight
+        if (self.c_xy is None) != (other.c_xy is None):
+            raise ValueError("Целевая переменная задана не во всех порциях")
+        if self.c_xy is not None:
+            self.m2_y += other.m2_y + delta_y ** 2 * weight
+            self.c_xy += other.c_xy + delta_x * delta_y * weight
+        if self.c_xx is not None and other.c_xx is not None:
+            self.c_xx += other.c_xx + np.outer(delta_x, delta_x) * weight
+        else:
+            self.c_xx = None
+        self.mean_x += delta_x * other.count / count
+        self.mean_y += delta_y * other.count / count
+        self.count = count
+        return self
+
+    def target_correlation(self):
+        # Корреляции каждого признака с целевой переменной
+        if self.c_xy is None:
+            raise ValueError("Целевая переменная не задана")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+
+    def matrix(self):
+        # Полная матрица корреляций между признаками
+        if self.c_xx is None:
+            raise ValueError("Полная матрица не накапливалась: нужен CorrelationAccumulator(full=True)")
+        scale = np.sqrt(self.m2_x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.c_xx / np.outer(scale, scale)
+
+
+def _accumulate(chunk, full):
+    return CorrelationAccumulator(full).update(*chunk)
+
+
+def accumulate(chunks, full=False, workers=1):
+    # Накопитель по всем порциям (X, y). workers - количество процессов (None - все ядра)
+    result = CorrelationAccumulator(full)
+    if workers == 1:
+        for X, y in chunks:
+            result.update(X, y)
+    else:
+        # Порции отправляются в пул по мере чтения, и в работе одновременно не больше
+        # PENDING_PER_WORKER порций на процесс, поэтому источник не читается в память целиком.
+        # Частичные результаты объединяются в порядке порций, как и в последовательном варианте
+        limit = (workers or os.cpu_count() or 1) * PENDING_PER_WORKER
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in chunks:
+                if len(pending) >= limit:
+                    result.merge(pending.popleft().result())
+                pending.append(executor.submit(_accumulate, chunk, full))
+            while pending:
+                result.merge(pending.popleft().result())
+    return result
+
+
+def best_worst(X, y, chunksize=100_000):
+    # Индексы признаков с наибольшей и наименьшей по модулю корреляцией с y
+    correlations = np.abs(accumulate(iter_chunks(X, y, chunksize)).target_correlation())
+    return np.argmax(correlations), np.argmin(correlations)
+
+
+def corr_rank(X, chunksize=100_000):
+    # Ранг матрицы корреляций признаков. Матрица симметричная, поэтому вместо SVD
+    # достаточно собственных чисел; порог - как в np.linalg.matrix_rank
+    matrix = accumulate(iter_chunks(X, None, chunksize), full=True).matrix()
+    eigenvalues = np.abs(np.linalg.eigvalsh(matrix))
+    tolerance = eigenvalues.max() * len(matrix) * np.finfo(matrix.dtype).eps
+    return int((eigenvalues > tolerance).sum())
+
+
+def pearsonr(x, y, chunksize=100_000):
+    # Коэффициент Пирсона и двусторонний p-value t-критерия с n - 2 степенями свободы
+    result = accumulate(iter_chunks(x, y, chunksize))
+    r = float(result.target_correlation()[0])
+    degrees = result.count - 2
+    t_score = r * np.sqrt(degrees / (1 - r ** 2)) if abs(r) < 1 else np.copysign(np.inf, r)
+    return r, float(2 * stats.t.sf(abs(t_score), degrees))